@@ -1,5 +1,5 @@
 # backend/main.py
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from fastapi import FastAPI, Depends, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from jose import jwt
@@ -10,32 +10,60 @@ from dotenv import load_dotenv
 from pydantic_settings import BaseSettings
 import httpx
 from typing import Optional
-import asyncio, json
-from fastapi.responses import StreamingResponse
+import asyncio, json, hashlib, heapq, itertools, re, math
+from fastapi.responses import StreamingResponse, Response
 from typing import Dict, Any
-from pymongo import ReturnDocument
+from pymongo import DeleteOne, ReplaceOne, ReturnDocument, UpdateOne
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
-from fastapi import Body
+from fastapi import Body, Query
 from typing import Literal
+from contextlib import asynccontextmanager, contextmanager
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from backend.services import analytics, availability, bson_json
+from backend.services.courses import CourseIndex, normalize_course
+from backend.services.jobs import JobQueue
+from backend.services.leaderboard import Leaderboard
+from backend.services.matching import MatchIndex
+from backend.services.reminders import ReminderHeap
+from backend.services.sessions import SessionIndex
+from backend.services.similarity import SimilarityIndex
+from backend.services.request_view import RequestView
+from backend.services.singleflight import SingleFlight
 
 # Always load the .env that sits beside this file
 load_dotenv(dotenv_path=Path(__file__).with_name(".env"))
 
-subscribers: set[asyncio.Queue] = set()
+subscribers: dict[asyncio.Queue, Optional[ObjectId]] = {}  # queue -> user id
+user_queues: dict[ObjectId, set[asyncio.Queue]] = {}  # user id -> their open streams
 
 
+def _subscribe(q: asyncio.Queue, uid: Optional[ObjectId]):
+    subscribers[q] = uid
+    if uid:
+        user_queues.setdefault(uid, set()).add(q)
 
-async def broadcast(evt: Dict[str, Any]):
-    # fan-out to all subscribers
+def _unsubscribe(q: asyncio.Queue):
+    uid = subscribers.pop(q, None)
+    qs = user_queues.get(uid)
+    if qs is not None:
+        qs.discard(q)
+        if not qs:
+            del user_queues[uid]
+
+
+async def broadcast(evt: Dict[str, Any], to: Optional[set] = None):
+    # fan-out to all subscribers, or only to the streams of the users in `to`
+    targets = list(subscribers) if to is None else [q for uid in to for q in user_queues.get(uid, ())]
     dead = []
-    for q in list(subscribers):
+    for q in targets:
         try:
             q.put_nowait(evt)
         except Exception:
             dead.append(q)
     for q in dead:
-        subscribers.discard(q)
+        _unsubscribe(q)
 
 
 # --- Settings from .env ---
@@ -44,6 +72,17 @@ class Settings(BaseSettings):
     AUTH0_DOMAIN: str
     AUTH0_AUDIENCE: str
     PORT: int = 8080
+    # serve open/accepted lists from an in-memory view (needs a replica set for change streams)
+    REQUEST_VIEW: bool = False
+    REQUEST_VIEW_MAX_LAG: float = 5.0
+    # SSE reminder this many minutes before an accepted session
+    REMINDER_MINUTES: int = 15
+    # background job workers per process
+    JOB_WORKERS: int = 4
+    # open requests nobody accepts expire after this many days
+    REQUEST_TTL_DAYS: int = 14
+    # completed requests move to requests_archive this many days after completion
+    ARCHIVE_AFTER_DAYS: int = 30
 
     class Config:
         env_file = ".env"
@@ -51,8 +90,118 @@ class Settings(BaseSettings):
 
 settings = Settings()
 
+
+# --- Startup: indexes ---
+def _ensure_indexes():
+    # one user per Auth0 subject; legacy rows without a sub are left out of the constraint
+    db.users.create_index(
+        "auth0Sub",
+        unique=True,
+        partialFilterExpression={"auth0Sub": {"$type": "string"}},
+    )
+    db.users.create_index("email")
+    db.users.create_index([("points", -1)])
+    # calendar lookups: one branch per participant role (two array fields can't share a compound index)
+    db.requests.create_index([("studentId", 1), ("schedules.startAt", 1)])
+    db.requests.create_index([("tutorId", 1), ("schedules.startAt", 1)])
+    db.requests.create_index("schedules.startAt")  # upcoming-session window for reminders
+    db.requests.create_index([("status", 1), ("createdAt", -1)])
+    db.requests.create_index("version")
+    db.requests.create_index(
+        [("course", "text"), ("topic", "text"), ("description", "text")],
+        weights={"course": 5, "topic": 3, "description": 1},
+        name="requests_text",
+    )
+    db.requests.create_index([("course", 1), ("status", 1), ("createdAt", -1)])
+    db.requests.create_index([("status", 1), ("hotScore", -1)])
+    db.requests.create_index([("status", 1), ("expiresAt", 1)])
+    db.requests.create_index([("status", 1), ("completedAt", 1)])
+    # per-participant lists (bootstrap's accepted/completed, the caller's own open requests)
+    db.requests.create_index([("studentId", 1), ("status", 1), ("createdAt", -1)])
+    db.requests.create_index([("tutorId", 1), ("status", 1), ("createdAt", -1)])
+    # archive: only completed requests, read per user (history, calendar, ratings) or newest first
+    db.requests_archive.create_index([("createdAt", -1)])
+    db.requests_archive.create_index([("studentId", 1), ("createdAt", -1)])
+    db.requests_archive.create_index([("tutorId", 1), ("createdAt", -1)])
+    db.requests_archive.create_index([("studentId", 1), ("schedules.startAt", 1)])
+    db.requests_archive.create_index([("tutorId", 1), ("schedules.startAt", 1)])
+    db.requests_archive.create_index("version")  # /requests/changes reads both collections
+    jobs.ensure_indexes()
+    analytics.ensure_indexes(db.stats_daily)
+    db.messages.create_index([("rid", 1), ("createdAt", -1), ("_id", -1)])
+    db.notifications.create_index([("userId", 1), ("_id", -1)])
+    db.notifications.create_index("createdAt", expireAfterSeconds=90 * 24 * 3600)
+
+
+# --- Startup: periodic background work ---
+_periodic: list = []  # (interval seconds, fn, run at startup)
+
+def periodic(seconds: float, at_startup: bool = True):
+    """Run the decorated function (at startup, unless told not to) and then every `seconds`; sync ones run off the event loop."""
+    def deco(fn):
+        _periodic.append((seconds, fn, at_startup))
+        return fn
+    return deco
+
+async def _run_every(seconds: float, fn, at_startup: bool = True):
+    if not at_startup:
+        await asyncio.sleep(seconds)
+    while True:
+        try:
+            if asyncio.iscoroutinefunction(fn):
+                await fn()
+            else:
+                await asyncio.to_thread(fn)
+        except Exception as e:
+            print(f"❌ {fn.__name__} failed:", e)
+        await asyncio.sleep(seconds)
+
+
+# --- Startup: one-time data migrations ---
+_migrations: list = []  # run in definition order
+
+def migration(fn):
+    """Run the decorated function once per database, recorded in db.migrations."""
+    _migrations.append(fn)
+    return fn
+
+def _run_migrations():
+    for fn in _migrations:
+        try:
+            db.migrations.insert_one({"_id": fn.__name__, "startedAt": datetime.utcnow()})
+        except DuplicateKeyError:
+            continue  # done, or another worker is running it
+        try:
+            fn()
+        except Exception as e:
+            db.migrations.delete_one({"_id": fn.__name__})  # migrations are idempotent: retried next start
+            print(f"❌ Migration {fn.__name__} failed:", e)
+            continue
+        db.migrations.update_one({"_id": fn.__name__}, {"$set": {"doneAt": datetime.utcnow()}})
+        print(f"✅ Migration {fn.__name__} done")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        _ensure_indexes()
+    except PyMongoError as e:
+        print("❌ Index setup failed:", e)
+    if request_view:
+        request_view.start()
+    tasks = [asyncio.create_task(_run_every(*job)) for job in _periodic]
+    tasks.append(asyncio.create_task(asyncio.to_thread(_run_migrations)))
+    tasks.append(asyncio.create_task(_dispatch_reminders()))
+    tasks.extend(jobs.start(settings.JOB_WORKERS))
+    yield
+    for t in tasks:
+        t.cancel()
+    if request_view:
+        request_view.stop()
+
+
 # --- App & CORS ---
-app = FastAPI(title="Peerfect API")
+app = FastAPI(title="Peerfect API", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -80,6 +229,26 @@ except Exception as e:
     print("❌ Mongo connect failed:", e)
     # optionally: raise
 
+# read-only paths: docs stay raw BSON and are transcoded straight to JSON
+raw_requests = db.requests.with_options(codec_options=bson_json.RAW)
+raw_archive = db.requests_archive.with_options(codec_options=bson_json.RAW)
+# completed requests live in either collection (see _archive_completed)
+request_history = (db.requests, db.requests_archive)
+
+list_flights = SingleFlight()
+course_index = CourseIndex()
+match_index = MatchIndex()
+similar_index = SimilarityIndex()
+leaderboard = Leaderboard()
+session_index = SessionIndex()
+jobs = JobQueue(db.jobs)
+reminders = ReminderHeap(timedelta(minutes=settings.REMINDER_MINUTES))
+
+request_view: Optional[RequestView] = (
+    RequestView(db.requests, db.counters, db.stream_state, max_lag=settings.REQUEST_VIEW_MAX_LAG)
+    if settings.REQUEST_VIEW else None
+)
+
 # --- Auth0 helper ---
 async def get_userinfo_from_auth0(access_token: str):
     url = f"https://{settings.AUTH0_DOMAIN}/userinfo"
@@ -152,6 +321,10 @@ async def auth_user(req: Request):
 def health():
     return {"ok": True}
 
+@app.get("/metrics")
+def metrics():
+    return {"listRequests": list_flights.stats(), "jobs": jobs.stats()}
+
 def _oid(x):  # tiny helper to coerce string->ObjectId safely
     return x if isinstance(x, ObjectId) else ObjectId(x)
 
@@ -164,22 +337,273 @@ def _ensure_participant(req, uid: ObjectId):
     if req.get("studentId") != uid and req.get("tutorId") != uid:
         raise HTTPException(403, "Not a participant of this request")
 
+# --- Versioning for delta sync ---
+def _next_version(name: str) -> int:
+    # shared monotonically increasing counter (lives in Mongo so every worker agrees)
+    c = db.counters.find_one_and_update(
+        {"_id": name},
+        {"$inc": {"seq": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return c["seq"]
+
+# Request versions are handed out before the write, so writes can commit out of
+# order. Each version stays listed as pending until its write has finished and
+# /requests/changes never hands out a token past the oldest pending one.
+PENDING_VERSION_TTL = timedelta(seconds=30)  # a writer that died mid-write stops holding sync back
+
+def _reserve_version() -> int:
+    # one round trip: the bump and its `pending` entry land together (the second stage sees the new seq)
+    c = db.counters.find_one_and_update(
+        {"_id": "requests"},
+        [
+            {"$set": {"seq": {"$add": [{"$ifNull": ["$seq", 0]}, 1]}}},
+            {"$set": {"pending": {"$concatArrays": [
+                {"$ifNull": ["$pending", []]}, [{"v": "$seq", "at": "$$NOW"}],
+            ]}}},
+        ],
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return c["seq"]
+
+def _release_versions(taken: list):
+    # `committed` moves only after the writes landed, so ETags and the view can trust it
+    db.counters.update_one({"_id": "requests"},
+                           {"$pull": {"pending": {"v": {"$in": taken}}}, "$inc": {"committed": len(taken)}})
+
+@periodic(60)
+def _prune_pending_versions():
+    # left behind by writers that died mid-write; _committed_watermark already ignores them
+    stale = datetime.utcnow() - PENDING_VERSION_TTL
+    db.counters.update_one({"_id": "requests", "pending.at": {"$lt": stale}},
+                           {"$pull": {"pending": {"at": {"$lt": stale}}}})
+
+def _committed_watermark() -> int:
+    """Highest version V such that every requests write stamped <= V has finished."""
+    c = db.counters.find_one({"_id": "requests"}) or {}
+    stale = datetime.utcnow() - PENDING_VERSION_TTL
+    live = [p["v"] for p in c.get("pending", []) if p["at"] > stale]
+    return min(live) - 1 if live else c.get("seq", 0)
+
+@contextmanager
+def _request_write():
+    """
+    Yields `stamped(update, moved=None)` for the requests writes made inside the
+    block; their versions count as in flight until the block exits.
+    """
+    taken = []
+    def stamped(update: Dict[str, Any], moved: Optional[tuple] = None) -> Dict[str, Any]:
+        v = _reserve_version()
+        taken.append(v)
+        return _stamp(update, v, moved)
+    try:
+        yield stamped
+    finally:
+        if taken:
+            _release_versions(taken)
+
+def _stamp(update: Dict[str, Any], v: int, moved: Optional[tuple] = None) -> Dict[str, Any]:
+    """
+    Add updatedAt + version `v` to a requests update doc. `moved` is
+    (from_status, to_status) and records a transition so /requests/changes
+    can tell clients which list to drop the doc from.
+    """
+    update = dict(update)
+    update["$set"] = {**update.get("$set", {}), "updatedAt": datetime.utcnow(), "version": v}
+    if moved:
+        update["$push"] = {
+            **update.get("$push", {}),
+            "transitions": {"from": moved[0], "to": moved[1], "version": v},
+        }
+    return update
+
+# --- Conditional GETs (weak ETags from the shared counters) ---
+def _collection_version(name: str) -> int:
+    c = db.counters.find_one({"_id": name})
+    if not c:
+        return 0
+    # request versions are handed out before the write; `committed` is bumped after it
+    return c.get("committed", 0) if name == "requests" else c["seq"]
+
+def _etag(*parts) -> str:
+    return 'W/"' + "-".join(str(p) for p in parts) + '"'
+
+def _sub_tag(user) -> str:
+    # responses that depend on who is asking must not share a tag across users
+    return hashlib.sha1((user.get("sub") or "").encode()).hexdigest()[:12]
+
+def _not_modified(request: Request, etag: str) -> Optional[Response]:
+    inm = request.headers.get("If-None-Match")
+    if not inm:
+        return None
+    tags = {t.strip() for t in inm.split(",")}
+    if "*" in tags or etag in tags or etag[2:] in tags:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+    return None
+
+def _tagged(content, etag: str) -> JSONResponse:
+    return JSONResponse(content=content, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+def _tagged_body(body: bytes, etag: str) -> Response:
+    # same as _tagged for a body that is already rendered
+    return Response(content=body, media_type="application/json",
+                    headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
 # --- List schedules for a request ---
 @app.get("/requests/{rid}/schedules")
-async def list_schedules(rid: str, user=Depends(auth_user)):
+async def list_schedules(rid: str, request: Request, user=Depends(auth_user)):
+    etag = _etag("sched", rid, _collection_version("requests"), _sub_tag(user))
+    cached = _not_modified(request, etag)
+    if cached: return cached
+
     me = _user_or_404(user)
-    req = db.requests.find_one({"_id": ObjectId(rid)})
-    if not req: raise HTTPException(404, "Request not found")
-    _ensure_participant(req, me["_id"])
-    scheds = req.get("schedules", [])
-    # stringify ObjectIds for JSON
-    def _cast(s):
-        s = dict(s)
-        s["_id"] = str(s["_id"])
-        s["proposerId"] = str(s["proposerId"])
-        if s.get("decidedById"): s["decidedById"] = str(s["decidedById"])
-        return s
-    return list(map(_cast, scheds))
+    # participant check in the filter so the doc never needs decoding
+    flt = {"_id": ObjectId(rid), "$or": [{"studentId": me["_id"]}, {"tutorId": me["_id"]}]}
+    req = next((r for r in (coll.find_one(flt, {"schedules": 1}) for coll in (raw_requests, raw_archive)) if r), None)
+    if not req:
+        if not any(coll.count_documents({"_id": ObjectId(rid)}, limit=1) for coll in request_history):
+            raise HTTPException(404, "Request not found")
+        raise HTTPException(403, "Not a participant of this request")
+    scheds = bson_json.field_to_json(req.raw, "schedules") or "[]"
+    return _tagged_body(scheds.encode(), etag)
+
+# --- Session times ---
+def _parse_utc(value: str, field: str) -> datetime:
+    """ISO 8601 -> naive UTC datetime (what pymongo stores); naive input is taken as UTC."""
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(400, f"{field} must be an ISO 8601 datetime")
+    if dt.tzinfo:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+@periodic(24 * 3600)
+def _backfill_schedule_times():
+    # schedules proposed before times were typed only have the ISO strings
+    for req in db.requests.find({"schedules": {"$elemMatch": {"startAt": {"$exists": False}}}},
+                                {"schedules": 1}):
+        sets = {}
+        for i, sc in enumerate(req.get("schedules", [])):
+            if "startAt" in sc:
+                continue
+            try:
+                sets[f"schedules.{i}.startAt"] = _parse_utc(sc.get("start") or "", "start")
+                sets[f"schedules.{i}.endAt"] = _parse_utc(sc.get("end") or "", "end")
+            except HTTPException:
+                continue
+        if sets:
+            db.requests.update_one({"_id": req["_id"]}, {"$set": sets})
+
+# --- Overlap detection against accepted sessions ---
+SESSION_INDEX_LOOKBACK = timedelta(days=1)  # older sessions can't clash with anything still schedulable
+MAX_SESSION = timedelta(hours=12)
+
+def _session_bounds(sc) -> tuple:
+    start_at, end_at = sc.get("startAt"), sc.get("endAt")
+    if start_at is None or end_at is None:
+        start_at, end_at = _parse_utc(sc.get("start") or "", "start"), _parse_utc(sc.get("end") or "", "end")
+    return start_at, end_at
+
+@periodic(300)
+def _load_session_index():
+    since = datetime.utcnow() - SESSION_INDEX_LOOKBACK
+    rows = []
+    for d in db.requests.aggregate([
+        {"$match": {"schedules": {"$elemMatch": {"status": "accepted", "endAt": {"$gte": since}}}}},
+        {"$project": {"studentId": 1, "tutorId": 1, "schedules": 1}},
+        {"$unwind": "$schedules"},
+        {"$match": {"schedules.status": "accepted", "schedules.endAt": {"$gte": since}}},
+    ]):
+        sc = d["schedules"]
+        for uid in (d.get("studentId"), d.get("tutorId")):
+            if uid:
+                rows.append((uid, sc["_id"], sc["startAt"], sc["endAt"]))
+    session_index.load(rows)
+
+def _stored_conflicts(uid, start_at: datetime, end_at: datetime):
+    """Same as session_index.conflicts, from Mongo: sees sessions other workers accepted since the last reload."""
+    # sessions are at most MAX_SESSION long, so the (participant, schedules.startAt) index scan is bounded
+    hit = {"status": "accepted", "startAt": {"$gt": start_at - MAX_SESSION, "$lt": end_at}, "endAt": {"$gt": start_at}}
+    for d in db.requests.find({"$or": [{"studentId": uid, "schedules": {"$elemMatch": hit}},
+                                       {"tutorId": uid, "schedules": {"$elemMatch": hit}}]}, {"schedules": 1}):
+        for sc in d["schedules"]:
+            if sc.get("status") == "accepted" and sc.get("startAt") and sc["startAt"] < end_at and sc["endAt"] > start_at:
+                yield sc["startAt"], sc["endAt"], sc["_id"]
+
+def _schedule_conflicts(req, start_at: datetime, end_at: datetime, skip_sid=None, confirm: bool = False):
+    """
+    Accepted sessions of either participant overlapping [start_at, end_at).
+    The in-memory index is only as fresh as this worker's last reload; `confirm`
+    also asks Mongo, for decisions that must not double-book.
+    """
+    out, seen = [], set()
+    for uid in (req.get("studentId"), req.get("tutorId")):
+        if not uid:
+            continue
+        found = session_index.conflicts(uid, start_at, end_at)
+        if confirm:
+            found = itertools.chain(found, _stored_conflicts(uid, start_at, end_at))
+        for s, e, sid in found:
+            if sid != skip_sid and (uid, sid) not in seen:
+                seen.add((uid, sid))
+                out.append({"userId": str(uid), "sid": str(sid), "startAt": s, "endAt": e})
+    return out
+
+# --- Session reminders ---
+REMINDER_HORIZON = timedelta(hours=1)  # how far past the lead time the heap is filled
+reminders_changed = asyncio.Event()  # wakes the dispatcher when an earlier reminder is added
+
+def _reminder_payload(req, sid, start_at: datetime) -> dict:
+    return {"rid": req["_id"], "sid": sid, "startAt": start_at,
+            "to": {u for u in (req.get("studentId"), req.get("tutorId")) if u}}
+
+@periodic(REMINDER_HORIZON.total_seconds() / 2)
+def _load_reminders():
+    now = datetime.utcnow()
+    window = {"$gt": now, "$lte": now + reminders.lead + REMINDER_HORIZON}
+    rows = []
+    for d in db.requests.aggregate([
+        {"$match": {"schedules": {"$elemMatch": {"status": "accepted", "startAt": window,
+                                                  "remindedAt": {"$exists": False}}}}},
+        {"$project": {"studentId": 1, "tutorId": 1, "schedules": 1}},
+        {"$unwind": "$schedules"},
+        {"$match": {"schedules.status": "accepted", "schedules.startAt": window,
+                    "schedules.remindedAt": {"$exists": False}}},
+    ]):
+        sc = d["schedules"]
+        rows.append((sc["_id"], sc["startAt"], _reminder_payload(d, sc["_id"], sc["startAt"])))
+    reminders.load(rows)
+
+def _claim_reminder(rid, sid) -> bool:
+    # the marker makes each reminder fire once across restarts and workers;
+    # not stamped: it is bookkeeping, list caches don't need to refresh for it
+    res = db.requests.update_one(
+        {"_id": rid, "schedules": {"$elemMatch": {"_id": sid, "status": "accepted",
+                                                  "remindedAt": {"$exists": False}}}},
+        {"$set": {"schedules.$.remindedAt": datetime.utcnow()}},
+    )
+    return res.modified_count == 1
+
+async def _dispatch_reminders():
+    while True:
+        try:
+            for _, sid, p in reminders.pop_due(datetime.utcnow()):
+                if await asyncio.to_thread(_claim_reminder, p["rid"], sid):
+                    await broadcast({"type": "schedule:reminder", "rid": str(p["rid"]), "sid": str(sid),
+                                     "startAt": p["startAt"].isoformat() + "Z"}, to=p["to"])
+        except Exception as e:
+            print("❌ Reminder dispatch failed:", e)
+        # sleep until the next one is due (capped, the heap is also reloaded from a thread)
+        nxt = reminders.next_at()
+        wait = (nxt - datetime.utcnow()).total_seconds() if nxt else 30
+        reminders_changed.clear()
+        try:
+            await asyncio.wait_for(reminders_changed.wait(), min(max(wait, 0), 30))
+        except asyncio.TimeoutError:
+            pass
 
 # --- Propose a schedule ---
 @app.post("/requests/{rid}/schedules")
@@ -201,12 +625,19 @@ async def propose_schedule(
     note  = (payload.get("note") or "").strip()
     if not start or not end:
         raise HTTPException(400, "start and end (ISO 8601) are required")
+    start_at, end_at = _parse_utc(start, "start"), _parse_utc(end, "end")
+    if end_at <= start_at:
+        raise HTTPException(400, "end must be after start")
+    if end_at - start_at > MAX_SESSION:
+        raise HTTPException(400, "a session can be at most 12 hours")
 
     sched = {
         "_id": ObjectId(),
         "proposerId": me["_id"],
         "start": start,   # keep as ISO strings to avoid TZ headaches client-side
         "end": end,
+        "startAt": start_at,  # typed UTC copies for range queries
+        "endAt": end_at,
         "note": note,
         "status": "proposed",
         "decidedById": None,
@@ -214,14 +645,128 @@ async def propose_schedule(
         "decidedAt": None,
     }
 
-    db.requests.update_one({"_id": req["_id"]}, {"$push": {"schedules": sched}})
+    with _request_write() as stamped:
+        db.requests.update_one({"_id": req["_id"]}, stamped({"$push": {"schedules": sched}}))
     await broadcast({"type": "schedule:proposed", "rid": rid})
+    others = [u for u in (req.get("studentId"), req.get("tutorId")) if u != me["_id"]]
+    await _notify(_notification_rows(others, "schedule:proposed", req, sid=sched["_id"]))
     # return casted
     sched["__rid"] = rid
+    # proposals stay tentative: clashes are flagged here and enforced on accept
+    sched["conflicts"] = _schedule_conflicts(req, start_at, end_at)
     sched["_id"] = str(sched["_id"])
     sched["proposerId"] = str(sched["proposerId"])
     return sched
 
+# --- My calendar: sessions across all my requests ---
+@app.get("/me/calendar")
+async def my_calendar(
+    from_: str = Query(..., alias="from"),
+    to: str = Query(...),
+    include_proposed: int = 1,
+    user=Depends(auth_user),
+):
+    me = _user_or_404(user)
+    lo, hi = _parse_utc(from_, "from"), _parse_utc(to, "to")
+    if hi <= lo:
+        raise HTTPException(400, "to must be after from")
+    if hi - lo > timedelta(days=366):
+        raise HTTPException(400, "range is limited to one year")
+
+    window = {"$gte": lo, "$lt": hi}
+    statuses = ["accepted", "proposed"] if include_proposed else ["accepted"]
+    # $elemMatch: both bounds on the same schedule, so the multikey index scan is [lo, hi)
+    in_window = {"$elemMatch": {"startAt": window, "status": {"$in": statuses}}}
+    pipeline = [
+        # each $or branch is served by its (participant, schedules.startAt) index
+        {"$match": {"$or": [
+            {"studentId": me["_id"], "schedules": in_window},
+            {"tutorId": me["_id"], "schedules": in_window},
+        ]}},
+        {"$project": {"course": 1, "topic": 1, "status": 1, "studentId": 1, "tutorId": 1, "schedules": 1}},
+        {"$unwind": "$schedules"},
+        {"$match": {"schedules.startAt": window, "schedules.status": {"$in": statuses}}},
+        {"$sort": {"schedules.startAt": 1}},
+    ]
+    out = []
+    for d in (d for coll in request_history for d in coll.aggregate(pipeline)):
+        sc = d["schedules"]
+        out.append({
+            "rid": d["_id"], "sid": sc["_id"], "course": d.get("course"), "topic": d.get("topic"),
+            "role": "student" if d.get("studentId") == me["_id"] else "tutor",
+            "start": sc.get("start"), "end": sc.get("end"),
+            "startAt": sc.get("startAt"), "endAt": sc.get("endAt"),
+            "status": sc.get("status"), "note": sc.get("note"),
+        })
+    out.sort(key=lambda x: x["startAt"])
+    return JSONResponse(content=jsonable_encoder(out, custom_encoder={ObjectId: str}))
+
+# --- Weekly availability + mutual free slots ---
+FREE_SLOTS_MAX_DAYS = 28
+
+@app.get("/me/availability")
+async def get_availability(user=Depends(auth_user)):
+    me = _user_or_404(user)
+    return me.get("availability") or {"tz": "UTC", "windows": []}
+
+@app.put("/me/availability")
+async def set_availability(payload: dict = Body(...), user=Depends(auth_user)):
+    # { tz: "America/Chicago", windows: [{day: 0-6 (Mon-Sun), start: "HH:MM", end: "HH:MM"}] }
+    me = _user_or_404(user)
+    tz = payload.get("tz") or "UTC"
+    if not isinstance(tz, str):
+        raise HTTPException(400, "tz must be a string")
+    tz = tz.strip()
+    windows = payload.get("windows")
+    if not isinstance(windows, list):
+        raise HTTPException(400, "windows must be a list")
+    try:
+        windows = availability.validate(tz, windows)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    doc = {"tz": tz, "windows": windows}
+    db.users.update_one({"_id": me["_id"]}, {"$set": {"availability": doc, "updatedAt": datetime.utcnow()}})
+    _next_version("users")
+    return doc
+
+@app.get("/requests/{rid}/free-slots")
+async def free_slots(
+    rid: str,
+    duration: int = 60,  # minutes
+    n: int = 5,
+    days: int = 14,
+    from_: Optional[str] = Query(None, alias="from"),
+    user=Depends(auth_user),
+):
+    me = _user_or_404(user)
+    req = db.requests.find_one({"_id": _oid(rid)}, {"studentId": 1, "tutorId": 1, "status": 1})
+    if not req: raise HTTPException(404, "Request not found")
+    if req.get("status") not in {"open", "accepted"}:
+        raise HTTPException(400, "Scheduling only allowed for open/accepted requests")
+    # participants only: the student's free time is not for anyone browsing open requests
+    _ensure_participant(req, me["_id"])
+    other = req.get("tutorId")
+    if not other:
+        raise HTTPException(400, "Request has no tutor yet")
+    if not (15 <= duration <= 8 * 60):
+        raise HTTPException(400, "duration must be 15..480 minutes")
+    n = max(1, min(n, 50))
+    days = max(1, min(days, FREE_SLOTS_MAX_DAYS))
+
+    now = datetime.utcnow()
+    lo = max(_parse_utc(from_, "from"), now) if from_ else now
+    hi = lo + timedelta(days=days)
+    users = {u["_id"]: u.get("availability") for u in
+             db.users.find({"_id": {"$in": [req["studentId"], other]}}, {"availability": 1})}
+    busy = {uid: [(s, e) for s, e, _ in session_index.conflicts(uid, lo, hi)]
+            for uid in (req["studentId"], other)}
+    found = availability.mutual_slots(
+        users.get(req["studentId"]), users.get(other), busy[req["studentId"]], busy[other],
+        lo, hi, timedelta(minutes=duration), n,
+    )
+    return JSONResponse(content=jsonable_encoder(
+        [{"startAt": s, "endAt": e} for s, e in found]))
+
 # --- Accept / Decline a schedule ---
 @app.post("/requests/{rid}/schedules/{sid}")
 async def decide_schedule(
@@ -249,29 +794,50 @@ async def decide_schedule(
         raise HTTPException(400, "Proposal already decided")
     if target.get("proposerId") == me["_id"]:
         raise HTTPException(403, "You cannot decide your own proposal")
+    if action == "accept":
+        start_at, end_at = _session_bounds(target)
+        clashes = _schedule_conflicts(req, start_at, end_at, skip_sid=target["_id"], confirm=True)
+        if clashes:
+            when = ", ".join(f"{t:%Y-%m-%d %H:%M}" for t in sorted({c["startAt"] for c in clashes}))
+            raise HTTPException(409, f"Overlaps an accepted session (UTC {when})")
 
     new_status = "accepted" if action == "accept" else "declined"
     # positional array update by matching nested id
-    res = db.requests.update_one(
-        {"_id": req["_id"], "schedules._id": _oid(sid)},
-        {"$set": {
-            "schedules.$.status": new_status,
-            "schedules.$.decidedById": me["_id"],
-            "schedules.$.decidedAt": datetime.utcnow()
-        }}
-    )
+    with _request_write() as stamped:
+        res = db.requests.update_one(
+            {"_id": req["_id"], "schedules._id": _oid(sid)},
+            stamped({"$set": {
+                "schedules.$.status": new_status,
+                "schedules.$.decidedById": me["_id"],
+                "schedules.$.decidedAt": datetime.utcnow()
+            }})
+        )
     if not res.modified_count:
         raise HTTPException(400, "Could not update proposal")
 
+    if action == "accept":
+        for uid in (req.get("studentId"), req.get("tutorId")):
+            if uid:
+                session_index.add(uid, target["_id"], start_at, end_at)
+        if start_at > datetime.utcnow():
+            reminders.add(target["_id"], start_at, _reminder_payload(req, target["_id"], start_at))
+            reminders_changed.set()
+
     evt = "schedule:accepted" if action == "accept" else "schedule:declined"
     await broadcast({"type": evt, "rid": rid, "sid": sid})
+    await _notify(_notification_rows([target.get("proposerId")], evt, req, sid=target["_id"]))
 
     # If accepted and request was open, optionally auto-accept the request and create link
     if action == "accept" and req.get("status") == "open":
         link = f"https://meet.jit.si/peerfect-{rid}"
-        db.requests.update_one({"_id": req["_id"], "status": "open"},
-                               {"$set": {"status": "accepted", "link": link, "acceptedAt": datetime.utcnow()},
-                                "$setOnInsert": {}})  # harmless if already accepted
+        with _request_write() as stamped:
+            res = db.requests.update_one({"_id": req["_id"], "status": "open"},
+                                         stamped({"$set": {"status": "accepted", "link": link, "acceptedAt": datetime.utcnow()}},
+                                                 moved=("open", "accepted")))  # no-op if already accepted
+        if res.modified_count:
+            analytics.record(db.stats_daily, req.get("course"), datetime.utcnow(), accepted=1)
+        match_index.remove_open(req["_id"])
+        similar_index.remove(req["_id"])
         await broadcast({"type":"request:accepted","rid":rid})
 
     return {"ok": True, "status": new_status}
@@ -303,71 +869,725 @@ async def update_me(payload: dict = Body(...), user=Depends(auth_user)):
         {"$set": updates},
         return_document=ReturnDocument.AFTER,
     )
+    _next_version("users")
     doc["_id"] = str(doc["_id"])
     return doc
 
+# --- Per-user counters (kept with $inc on each transition) ---
+EMPTY_STATS = {
+    "requestsCreated": 0,    # as student
+    "requestsTutored": 0,    # accepted as tutor
+    "sessionsCompleted": 0,  # completed, either side
+    "ratingSum": 0,
+    "ratingCount": 0,
+}
+
+@periodic(24 * 3600, at_startup=False)
+def _repair_user_stats():
+    """Recompute every user's stats from request history (fixes drift from partial failures)."""
+    stats: Dict[ObjectId, Dict[str, int]] = {}
+    def row(uid):
+        return stats.setdefault(uid, dict(EMPTY_STATS))
+
+    for coll in request_history:
+        for g in coll.aggregate([{"$group": {
+            "_id": "$studentId",
+            "created": {"$sum": 1},
+            "completed": {"$sum": {"$cond": [{"$eq": ["$status", "completed"]}, 1, 0]}},
+        }}]):
+            r = row(g["_id"])
+            r["requestsCreated"] += g["created"]
+            r["sessionsCompleted"] += g["completed"]
+
+        for g in coll.aggregate([
+            {"$match": {"tutorId": {"$ne": None}, "status": {"$in": ["accepted", "completed"]}}},
+            {"$group": {
+                "_id": "$tutorId",
+                "tutored": {"$sum": 1},
+                "completed": {"$sum": {"$cond": [{"$eq": ["$status", "completed"]}, 1, 0]}},
+                "ratingSum": {"$sum": {"$cond": [{"$isNumber": "$rating"}, "$rating", 0]}},
+                "ratingCount": {"$sum": {"$cond": [{"$isNumber": "$rating"}, 1, 0]}},
+            }},
+        ]):
+            r = row(g["_id"])
+            r["requestsTutored"] += g["tutored"]
+            r["sessionsCompleted"] += g["completed"]
+            r["ratingSum"] += g["ratingSum"]
+            r["ratingCount"] += g["ratingCount"]
+
+    ops = []
+    for uid, st in stats.items():
+        fields = {"stats": st}
+        if st["ratingCount"]:
+            fields["rating"] = st["ratingSum"] / st["ratingCount"]
+        ops.append(UpdateOne({"_id": uid}, {"$set": fields}))
+    for i in range(0, len(ops), 1000):
+        db.users.bulk_write(ops[i:i + 1000], ordered=False)
+    db.users.update_many({"stats": {"$exists": False}}, {"$set": {"stats": dict(EMPTY_STATS)}})
+
+    # unread badges: recount (also catches notifications the TTL index removed unread)
+    unread = {g["_id"]: g["n"] for g in db.notifications.aggregate([
+        {"$match": {"read": False}}, {"$group": {"_id": "$userId", "n": {"$sum": 1}}},
+    ])}
+    for u in db.users.find({"unreadNotifications": {"$gt": 0}}, {"_id": 1}):
+        unread.setdefault(u["_id"], 0)
+    ops = [UpdateOne({"_id": uid}, {"$set": {"unreadNotifications": n}}) for uid, n in unread.items()]
+    for i in range(0, len(ops), 1000):
+        db.users.bulk_write(ops[i:i + 1000], ordered=False)
+    _next_version("users")
+
+
+@app.get("/users/{uid}")
+async def user_profile(uid: str, user=Depends(auth_user)):
+    """Public profile; counters are precomputed so this is a single point read."""
+    u = db.users.find_one({"_id": _oid(uid)}, {"name": 1, "avatarUrl": 1, "points": 1, "rating": 1, "stats": 1})
+    if not u: raise HTTPException(404, "User not found")
+    u["stats"] = {**EMPTY_STATS, **(u.get("stats") or {})}
+    u["_id"] = str(u["_id"])
+    return u
+
+
 # --- Create/find user on first login ---
-@app.get("/me")
-async def me(user=Depends(auth_user)):
+def _link_legacy_account(fresh, email: str):
+    """
+    A brand-new doc was just upserted for this sub. If an older account exists
+    for the same email, drop the placeholder and move the sub onto the old doc
+    so its _id (referenced by requests) keeps working. Safe to run from several
+    parallel logins at once; callers re-read the doc that owns the sub afterwards.
+    """
+    legacy = db.users.find_one(
+        {"email": email, "_id": {"$ne": fresh["_id"]}, "auth0Sub": {"$ne": fresh["auth0Sub"]}}
+    )
+    if not legacy:
+        db.users.update_one({"_id": fresh["_id"]}, {"$unset": {"linkPending": ""}})
+        return
+    db.users.delete_one({"_id": fresh["_id"]})
+    try:
+        db.users.update_one(
+            {"_id": legacy["_id"]},
+            {"$set": {"auth0Sub": fresh["auth0Sub"], "email": email, "name": fresh.get("name")}},
+        )
+    except DuplicateKeyError:
+        # a parallel login re-created the placeholder in between; the caller retries
+        return
+    _next_version("users")
+
+
+def _provision_user(user):
+    """Return the user doc for this token, creating it on first login (one round trip when it exists)."""
     sub = user.get("sub")
     if not sub:
         raise HTTPException(400, "No sub in token")
+    email = user.get("email")
+
+    for _ in range(3):
+        new_id = ObjectId()
+        try:
+            u = db.users.find_one_and_update(
+                {"auth0Sub": sub},
+                {"$setOnInsert": {
+                    "_id": new_id,
+                    "email": email,
+                    "name": user.get("name"),
+                    "points": 100,
+                    "courses": [],
+                    "rating": 5,
+                    "stats": dict(EMPTY_STATS),
+                    "createdAt": datetime.utcnow(),
+                    "linkPending": bool(email),  # cleared once the legacy-email check is done
+                }},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            # concurrent first login won the insert; loop and read its doc
+            continue
+        if u["_id"] == new_id:
+            _next_version("users")
+            leaderboard.set(u["_id"], u.get("points", 0))
+        if not u.get("linkPending"):
+            return u
+        # a first login (ours or a parallel one) may still swap this placeholder for a
+        # legacy account: finish the check here too, then trust only what owns the sub
+        _link_legacy_account(u, email or u.get("email"))
+        resolved = db.users.find_one({"auth0Sub": sub})
+        if resolved and not resolved.get("linkPending"):
+            if resolved["_id"] != u["_id"]:
+                leaderboard.discard(u["_id"])
+                leaderboard.set(resolved["_id"], resolved.get("points", 0))
+            return resolved
 
     u = db.users.find_one({"auth0Sub": sub})
     if not u:
-        email = user.get("email")
-        if email:
-            old = db.users.find_one({"email": email})
-            if old:
-                db.users.update_one(
-                    {"_id": old["_id"]},
-                    {
-                        "$set": {
-                            "auth0Sub": sub,
-                            "email": email,
-                            "name": user.get("name"),
-                        }
-                    },
-                )
-                u = db.users.find_one({"_id": old["_id"]})
+        raise HTTPException(500, "Could not provision user")
+    return u
 
-    if not u:
-        u = {
-            "auth0Sub": sub,
-            "email": user.get("email"),
-            "name": user.get("name"),
-            "points": 100,
-            "courses": [],
-            "rating": 5,
-            "createdAt": datetime.utcnow(),
-        }
-        db.users.insert_one(u)
 
-    u["_id"] = str(u["_id"])
-    return u
+@app.get("/me")
+async def me(request: Request, user=Depends(auth_user)):
+    etag = _etag("me", _collection_version("users"), _sub_tag(user))
+    cached = _not_modified(request, etag)
+    if cached: return cached
+
+    u = _provision_user(user)
+    return _tagged(jsonable_encoder(u, custom_encoder={ObjectId: str}), etag)
+
+
+# --- Notifications inbox (stored copy of the events meant for one user) ---
+NOTIFICATIONS_MAX_LIMIT = 100
+
+def _notification_rows(user_ids, type_: str, req, **extra) -> list:
+    return [{"userId": uid, "type": type_, "rid": req["_id"], "course": req.get("course"),
+             "topic": req.get("topic"), **extra} for uid in user_ids if uid]
+
+async def _notify(rows: list):
+    """Store notifications, bump each recipient's unread counter and push them to their streams."""
+    if not rows:
+        return
+    now = datetime.utcnow()
+    docs = [{**r, "read": False, "createdAt": now} for r in rows]
+    db.notifications.insert_many(docs)
+    per_user: Dict[ObjectId, int] = {}
+    for d in docs:
+        per_user[d["userId"]] = per_user.get(d["userId"], 0) + 1
+    db.users.bulk_write([UpdateOne({"_id": uid}, {"$inc": {"unreadNotifications": n}})
+                         for uid, n in per_user.items()], ordered=False)
+    _next_version("users")
+    for d in docs:
+        await broadcast({"type": "notification", "notification": jsonable_encoder(d, custom_encoder={ObjectId: str})},
+                        to={d["userId"]})
+
+@app.get("/me/notifications")
+async def my_notifications(before: Optional[str] = None, limit: int = 20, user=Depends(auth_user)):
+    me = _user_or_404(user)
+    limit = max(1, min(limit, NOTIFICATIONS_MAX_LIMIT))
+    q: Dict[str, Any] = {"userId": me["_id"]}
+    if before:
+        q["_id"] = {"$lt": _oid(before)}
+    # newest first by _id; the last id of a page is the cursor for the next one
+    items = list(db.notifications.find(q, {"userId": 0}).sort("_id", -1).limit(limit))
+    return JSONResponse(content=jsonable_encoder({
+        "items": items,
+        "next": items[-1]["_id"] if len(items) == limit else None,
+        "unread": me.get("unreadNotifications", 0),
+    }, custom_encoder={ObjectId: str}))
+
+@app.post("/me/notifications/read")
+async def mark_notifications_read(payload: dict = Body(default={}), user=Depends(auth_user)):
+    # { ids?: [...] } -- without ids everything is marked read
+    me = _user_or_404(user)
+    q: Dict[str, Any] = {"userId": me["_id"], "read": False}
+    if payload.get("ids"):
+        q["_id"] = {"$in": [_oid(i) for i in payload["ids"]]}
+    res = db.notifications.update_many(q, {"$set": {"read": True, "readAt": datetime.utcnow()}})
+    if res.modified_count:
+        # only what this call actually flipped, so concurrent marks can't double-decrement
+        db.users.update_one({"_id": me["_id"]}, {"$inc": {"unreadNotifications": -res.modified_count}})
+        _next_version("users")
+    return {"ok": True, "unread": max(me.get("unreadNotifications", 0) - res.modified_count, 0)}
+
+
+# --- Expiry of stale open requests ---
+EXPIRE_BATCH_SIZE = 500
+
+def _expire_batch(now: datetime) -> tuple:
+    """Expire one batch; returns (requests this sweep flipped, whether more may be due)."""
+    fields = {"course": 1, "topic": 1, "studentId": 1}
+    ids = [d["_id"] for d in db.requests.find(
+        {"status": "open", "expiresAt": {"$lte": now}}, {"_id": 1}
+    ).sort("expiresAt", 1).limit(EXPIRE_BATCH_SIZE)]
+    if not ids:
+        return [], False
+    # status in the filter: a request accepted meanwhile is left alone
+    with _request_write() as stamped:
+        db.requests.update_many({"_id": {"$in": ids}, "status": "open"},
+                                stamped({"$set": {"status": "expired", "expiredAt": now}},
+                                        moved=("open", "expired")))
+    # only what this update flipped gets counted and notified
+    docs = list(db.requests.find({"_id": {"$in": ids}, "status": "expired", "expiredAt": now}, fields))
+    analytics.record_many(db.stats_daily, now, "expired", (d.get("course") for d in docs))
+    for d in docs:
+        match_index.remove_open(d["_id"])
+        similar_index.remove(d["_id"])
+    return docs, len(ids) == EXPIRE_BATCH_SIZE
+
+def _backfill_expiry():
+    # requests created before expiry existed get createdAt + TTL
+    db.requests.update_many(
+        {"status": "open", "expiresAt": {"$exists": False}},
+        [{"$set": {"expiresAt": {"$add": ["$createdAt", settings.REQUEST_TTL_DAYS * 24 * 3600 * 1000]}}}],
+    )
+
+@periodic(300)
+async def _expire_stale_requests():
+    await asyncio.to_thread(_backfill_expiry)
+    now = datetime.utcnow()
+    expired = 0
+    while True:
+        batch, more = await asyncio.to_thread(_expire_batch, now)
+        expired += len(batch)
+        await _notify([row for d in batch for row in _notification_rows([d["studentId"]], "request:expired", d)])
+        if not more:
+            break
+    if expired:
+        # one event per sweep; clients refetch the open list
+        await broadcast({"type": "request:expired", "count": expired})
+
+# --- Archival of old completed requests ---
+ARCHIVE_BATCH_SIZE = 500
+
+@periodic(3600, at_startup=False)
+def _archive_completed():
+    cutoff = datetime.utcnow() - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+    while True:
+        docs = list(db.requests.find({"status": "completed", "completedAt": {"$lte": cutoff}})
+                    .limit(ARCHIVE_BATCH_SIZE))
+        if not docs:
+            return
+        # copy first, then delete: a crash in between leaves a duplicate that the
+        # next run overwrites (upsert) and list reads skip, never a lost request.
+        # The delete is fenced on version, so a rating that lands mid-copy keeps
+        # the live doc until the next run archives it again.
+        db.requests_archive.bulk_write(
+            [ReplaceOne({"_id": d["_id"]}, d, upsert=True) for d in docs], ordered=False)
+        db.requests.bulk_write(
+            [DeleteOne({"_id": d["_id"], "status": "completed", "version": d.get("version")}) for d in docs],
+            ordered=False)
+        if len(docs) < ARCHIVE_BATCH_SIZE:
+            return
+
+# --- "Hot" feed score for open requests ---
+HOT_AGE_HOURS = 12  # waiting this long counts as much as doubling the points
+HOT_EPOCH = datetime(2025, 1, 1)
+
+def _hot_score(points: int, created_at: datetime) -> float:
+    # log2(1 + points) + age / 12h, minus the `now` term every request shares: ranks the
+    # same at any moment, so it is stored once at creation and never refreshed
+    return math.log2(1 + max(points, 0)) - (created_at - HOT_EPOCH).total_seconds() / 3600 / HOT_AGE_HOURS
+
+@migration
+def _hot_score_fixed_epoch():
+    # scores written by the old 5-minute refresh included the age term; restate them
+    with _request_write() as stamped:
+        db.requests.update_many({"status": "open"}, [
+            {"$set": {"hotScore": {"$subtract": [
+                {"$log": [{"$add": [1, {"$max": ["$pointsOffered", 0]}]}, 2]},
+                {"$divide": [{"$subtract": ["$createdAt", HOT_EPOCH]}, HOT_AGE_HOURS * 3600 * 1000]},
+            ]}}},
+            {"$set": stamped({})["$set"]},  # hot-sorted ETags move with the requests version
+        ])
 
 
 # --- List open/accepted/completed requests ---
+STREAM_BATCH_SIZE = 500  # docs per cursor batch and per written chunk
+
+def _stream_docs(cursor, ndjson: bool):
+    """
+    Encode a raw cursor chunk by chunk: a JSON array, or one doc per line for NDJSON.
+    Only one batch is ever held in memory. Sync on purpose so Starlette
+    iterates it in the threadpool instead of blocking the event loop.
+    """
+    dump = lambda d: bson_json.to_json(d.raw)
+
+    first = True
+    chunk = [] if ndjson else ["["]
+    for d in cursor:
+        if ndjson:
+            chunk.append(dump(d) + "\n")
+        else:
+            chunk.append(dump(d) if first else "," + dump(d))
+        first = False
+        if len(chunk) >= STREAM_BATCH_SIZE:
+            yield "".join(chunk).encode()
+            chunk = []
+    if not ndjson:
+        chunk.append("]")
+    if chunk:
+        yield "".join(chunk).encode()
+
+
+def _merge_newest_first(cursors):
+    """Merge createdAt-descending cursors; drops the copy of a doc caught mid-archive in both."""
+    last_at, seen = None, set()
+    for d in heapq.merge(*cursors, key=lambda d: d["createdAt"], reverse=True):
+        if d["createdAt"] != last_at:
+            last_at, seen = d["createdAt"], set()
+        if d["_id"] in seen:
+            continue
+        seen.add(d["_id"])
+        yield d
+
+
 @app.get("/requests")
 async def list_requests(
-    status: str = "open", mine: Optional[int] = 0, user=Depends(auth_user)
+    request: Request,
+    status: str = "open",
+    mine: Optional[int] = 0,
+    stream: Optional[int] = 0,  # opt-in for large listings: flat memory, early first byte
+    sort: Literal["new", "hot"] = "new",
+    limit: Optional[int] = None,
+    offset: int = 0,
+    user=Depends(auth_user),
 ):
+    hot = sort == "hot"
+    if hot and status != "open":
+        raise HTTPException(400, "sort=hot is only available for open requests")
+    if (limit is not None and limit <= 0) or offset < 0:
+        raise HTTPException(400, "limit must be > 0 and offset >= 0")
+
+    # read before the query and bumped only after writes land: a racing write makes the tag stale, never wrong
+    version = _collection_version("requests")
+    etag = _etag("req", version, sort,
+                 _sub_tag(user) if mine else "all")
+    cached = _not_modified(request, etag)
+    if cached: return cached
+
+    paged = limit is not None or offset > 0
+    if request_view and not mine and not stream and not hot and not paged:
+        body = request_view.body(status, min_version=version)
+        if body is not None:
+            return _tagged_body(body, etag)
+
     q = {"status": status}
+    owner = None
     if mine:
         me = db.users.find_one({"auth0Sub": user.get("sub")})
         if not me:
             raise HTTPException(400, "User not found")
-        q["$or"] = [{"studentId": me["_id"]}, {"tutorId": me["_id"]}]
+        owner = me["_id"]
+        q["$or"] = [{"studentId": owner}, {"tutorId": owner}]
+
+    order = [("hotScore", -1), ("createdAt", -1)] if hot else [("createdAt", -1)]
+
+    def find(batch_size: int = 0):
+        if status != "completed":
+            cursor = raw_requests.find(q, {"transitions": 0}, batch_size=batch_size).sort(order).skip(offset)
+            return cursor.limit(limit) if limit else cursor
+        # completed: hot + archived, both newest first, merged; each side may hold the whole page
+        cursors = [coll.find(q, {"transitions": 0}, batch_size=batch_size).sort(order)
+                   for coll in (raw_requests, raw_archive)]
+        if limit:
+            cursors = [c.limit(offset + limit) for c in cursors]
+        merged = _merge_newest_first(cursors)
+        return itertools.islice(merged, offset, offset + limit if limit else None)
+
+    if stream:
+        ndjson = "application/x-ndjson" in request.headers.get("Accept", "")
+        cursor = find(STREAM_BATCH_SIZE)
+        return StreamingResponse(
+            _stream_docs(cursor, ndjson),
+            media_type="application/x-ndjson" if ndjson else "application/json",
+            headers={"ETag": etag, "Cache-Control": "private, no-cache"},
+        )
+
+    def render() -> bytes:
+        # raw BSON -> JSON; ObjectIds/datetimes come out exactly as jsonable_encoder would
+        return bson_json.array_to_json(find())
+
+    # identical concurrent reads (e.g. right after a broadcast) share one query + encode;
+    # the etag (versions) in the key keeps a caller from joining a query that predates its tag
+    body = await list_flights.do((status, owner, etag, limit, offset), render)
+    return _tagged_body(body, etag)
+
+
 
-    docs = list(db.requests.find(q).sort("createdAt", -1))
+# --- One-shot initial load: me + open/accepted/completed ---
+# fields the list views render; keeps unrelated/heavy fields off the wire
+REQUEST_SUMMARY = {
+    "studentId": 1, "tutorId": 1, "course": 1, "topic": 1, "description": 1,
+    "pointsOffered": 1, "status": 1, "link": 1, "schedules": 1,
+    "createdAt": 1, "acceptedAt": 1, "completedAt": 1,
+}
+BOOTSTRAP_STATUSES = ("open", "accepted", "completed")
+BOOTSTRAP_LIMIT = 200       # newest open requests site-wide unless the client asks otherwise
+BOOTSTRAP_MAX_LIMIT = 1000
+
+
+@app.get("/bootstrap")
+async def bootstrap(
+    request: Request,
+    open_limit: int = BOOTSTRAP_LIMIT,
+    accepted_limit: Optional[int] = None,
+    completed_limit: Optional[int] = None,
+    user=Depends(auth_user),
+):
+    """
+    Everything the client needs on load (and after an SSE event) in one call:
+    a single auth + user lookup, the newest open requests (plus the caller's
+    own) and the caller's accepted and completed requests, archive included.
+    Only the site-wide open list is capped by default; the other two are the
+    caller's own and optionally limited.
+    """
+    limits = dict(zip(BOOTSTRAP_STATUSES, (open_limit, accepted_limit, completed_limit)))
+    for status, n in limits.items():
+        if n is not None and not 0 < n <= BOOTSTRAP_MAX_LIMIT:
+            raise HTTPException(400, f"{status}_limit must be 1..{BOOTSTRAP_MAX_LIMIT}")
+
+    version = _collection_version("requests")
+    etag = _etag("boot", version, _collection_version("users"), _sub_tag(user))
+    cached = _not_modified(request, etag)
+    if cached: return cached
+
+    u = _provision_user(user)
+    mine = {"$or": [{"studentId": u["_id"]}, {"tutorId": u["_id"]}]}
+
+    def newest(coll, q, n):
+        return coll.find(q, REQUEST_SUMMARY).sort("createdAt", -1).limit(n or 0)  # 0 = no limit
+
+    def newest_open() -> list:
+        # the same for every caller: from the view when it can vouch, else one bounded
+        # (status, createdAt) index walk, shared by concurrent callers like list_requests
+        docs = request_view.newest("open", open_limit, min_version=version) if request_view else None
+        if docs is None:
+            return list(newest(db.requests, {"status": "open"}, open_limit))
+        return [{k: d[k] for k in ("_id", *REQUEST_SUMMARY) if k in d} for d in docs]
+
+    # the caller's own open requests are added even when older, so the client's
+    # "mine" tab never loses them; accepted/completed are per caller and indexed
+    open_docs = await list_flights.do(("bootstrap:open", version, open_limit), newest_open)
+    shown = {d["_id"] for d in open_docs}
+    own = [d for d in newest(db.requests, {"status": "open", "studentId": u["_id"]}, None) if d["_id"] not in shown]
+    if own:
+        open_docs = sorted(open_docs + own, key=lambda d: d["createdAt"], reverse=True)
+    lists = {
+        "open": open_docs,
+        "accepted": list(newest(db.requests, {"status": "accepted", **mine}, accepted_limit)),
+        "completed": list(itertools.islice(_merge_newest_first(
+            [newest(coll, {"status": "completed", **mine}, completed_limit) for coll in request_history]
+        ), completed_limit)),
+    }
+
+    encoded = jsonable_encoder(
+        {"me": u, **{status: lists[status] for status in BOOTSTRAP_STATUSES}},
+        custom_encoder={ObjectId: str},
+    )
+    return _tagged(encoded, etag)
 
-    # You can keep your manual stringification if you want,
-    # but the line below will safely handle ANY remaining ObjectId.
-    encoded = jsonable_encoder(docs, custom_encoder={ObjectId: str})
+
+
+# --- Delta sync: what changed since the client's token ---
+@app.get("/requests/changes")
+async def request_changes(since: int = 0, user=Depends(auth_user)):
+    """
+    Docs created or modified after version `since`, plus tombstones for docs
+    that left a status list in that window. `token` is the version to send next time.
+    since=0 returns everything (legacy docs without a version included).
+    """
+    if since < 0:
+        raise HTTPException(400, "since must be >= 0")
+    # only versions whose writes have all finished: a later token can't skip a slow one
+    watermark = _committed_watermark()
+    q = {"version": {"$gt": since, "$lte": watermark}} if since else {"version": {"$not": {"$gt": watermark}}}
+    # archived requests too: since=0 must see them, and they can still be rated
+    newest: Dict[ObjectId, dict] = {}
+    for coll in request_history:
+        for d in coll.find(q):
+            # mid-archive a request sits in both collections; keep the newer copy
+            if d["_id"] not in newest or d.get("version", 0) > newest[d["_id"]].get("version", 0):
+                newest[d["_id"]] = d
+    docs = sorted(newest.values(), key=lambda d: d.get("version", 0))
+
+    token = max(since, watermark)
+    removed = []
+    for d in docs:
+        left = {t["from"] for t in d.pop("transitions", []) if t.get("version", 0) > since}
+        left.discard(d.get("status"))
+        if left:
+            removed.append({"_id": d["_id"], "from": sorted(left)})
+
+    encoded = jsonable_encoder(
+        {"token": token, "changes": docs, "removed": removed},
+        custom_encoder={ObjectId: str},
+    )
     return JSONResponse(content=encoded)
 
 
 
+# --- Search by course / topic text ---
+SEARCH_MAX_LIMIT = 100
+
+@app.get("/requests/search")
+async def search_requests(
+    q: str = "",
+    course: str = "",
+    status: str = "open",
+    limit: int = 20,
+    offset: int = 0,
+    user=Depends(auth_user),
+):
+    """
+    Text search over course/topic/description (relevance ranked), optionally
+    narrowed to a course-code prefix. Without `q` it is a course browse, newest first.
+    Page with `offset`; `next` is the offset of the following page or null.
+    """
+    if not 0 < limit <= SEARCH_MAX_LIMIT:
+        raise HTTPException(400, f"limit must be between 1 and {SEARCH_MAX_LIMIT}")
+    if offset < 0:
+        raise HTTPException(400, "offset must be >= 0")
+    q, course = q.strip(), normalize_course(course)
+    if not q and not course:
+        raise HTTPException(400, "q or course is required")
+
+    flt: Dict[str, Any] = {"status": status}
+    if course:
+        # anchored, case-sensitive prefix so the (course, status, createdAt) index is used
+        flt["course"] = {"$regex": "^" + re.escape(course)}
+    projection = {k: 1 for k in REQUEST_SUMMARY if k != "schedules"}
+    if q:
+        flt["$text"] = {"$search": q}
+        projection["score"] = {"$meta": "textScore"}
+        cursor = raw_requests.find(flt, projection).sort([("score", {"$meta": "textScore"}), ("createdAt", -1)])
+    else:
+        cursor = raw_requests.find(flt, projection).sort("createdAt", -1)
+
+    # one extra row tells us whether there is a next page
+    rows = list(cursor.skip(offset).limit(limit + 1))
+    nxt = offset + limit if len(rows) > limit else None
+    body = b'{"results":' + bson_json.array_to_json(rows[:limit]) + b',"next":' + json.dumps(nxt).encode() + b"}"
+    return Response(content=body, media_type="application/json")
+
+
+
+# --- Course autocomplete ---
+@periodic(300)
+def _load_course_index():
+    # cold start + periodic catch-up with courses created by other workers
+    counts = db.requests.aggregate([{"$group": {"_id": "$course", "n": {"$sum": 1}}}])
+    course_index.load((c["_id"], c["n"]) for c in counts if isinstance(c["_id"], str))
+
+@migration
+def _normalize_courses():
+    # codes stored before create_request normalized them ("comp182", "COMP-182"):
+    # search, matching and the rollups only know the canonical "COMP 182"
+    for coll in request_history:
+        for c in list(coll.aggregate([{"$group": {"_id": "$course"}}])):
+            course = c["_id"]
+            if isinstance(course, str) and normalize_course(course) != course:
+                with _request_write() as stamped:
+                    coll.update_many({"course": course}, stamped({"$set": {"course": normalize_course(course)}}))
+    counters = (*analytics.EVENTS, "pointsMoved")
+    for r in db.stats_daily.find({}, {"course": 1, "day": 1, **{k: 1 for k in counters}}):
+        course = normalize_course(r["course"])
+        if course != r["course"]:
+            counts = {k: r[k] for k in counters if r.get(k)}
+            if counts:
+                db.stats_daily.update_one({"course": course, "day": r["day"]}, {"$inc": counts}, upsert=True)
+            db.stats_daily.delete_one({"_id": r["_id"]})
+    # this worker's indexes were loaded from the old spellings; others catch up on their own reloads
+    _load_course_index()
+    _load_open_matches()
+    _load_tutor_history()
+    _load_similar_index()
+
+@app.get("/courses/suggest")
+def suggest_courses(prefix: str = "", limit: int = 10):
+    """Known course codes starting with `prefix`, most used first. Public: course codes aren't sensitive."""
+    if not 0 < limit <= 50:
+        raise HTTPException(400, "limit must be between 1 and 50")
+    return course_index.suggest(prefix, limit)
+
+
+
+# --- Recommendations for tutors ---
+@periodic(300)
+def _load_open_matches():
+    # cold start + catch-up with requests opened or taken on other workers
+    match_index.load_open(
+        db.requests.find({"status": "open"}, {"course": 1, "studentId": 1, "pointsOffered": 1, "createdAt": 1}))
+
+@periodic(24 * 3600)
+def _load_tutor_history():
+    # only grows, and this worker's completions are added in place; counted in Mongo
+    match_index.load_tutored(
+        (g["_id"]["tutorId"], g["_id"]["course"], g["n"])
+        for coll in request_history
+        for g in coll.aggregate([
+            {"$match": {"status": "completed"}},
+            {"$group": {"_id": {"tutorId": "$tutorId", "course": "$course"}, "n": {"$sum": 1}}},
+        ])
+    )
+
+@app.get("/requests/recommended")
+async def recommended_requests(limit: int = 20, user=Depends(auth_user)):
+    """
+    Open requests in courses the caller has tutored before, ranked by how often
+    they tutored the course, points offered and time waiting. Ranking is done
+    in memory; Mongo only serves the top `limit` docs by _id.
+    """
+    if not 0 < limit <= 100:
+        raise HTTPException(400, "limit must be between 1 and 100")
+    me = _user_or_404(user)
+    ranked = match_index.recommend(me["_id"], limit)
+    if not ranked:
+        return []
+    scores = dict(ranked)
+    docs = {d["_id"]: d for d in db.requests.find(
+        {"_id": {"$in": list(scores)}, "status": "open"}, REQUEST_SUMMARY)}
+    out = []
+    for rid, score in ranked:
+        if rid in docs:
+            out.append({**docs[rid], "matchScore": score})
+    return JSONResponse(content=jsonable_encoder(out, custom_encoder={ObjectId: str}))
+
+
+
+# --- Similar open requests (duplicate hints while drafting) ---
+@periodic(3600)
+def _load_similar_index():
+    # full rebuild also refreshes the idf snapshot; adds/removes keep it current in between
+    similar_index.load(db.requests.find({"status": "open"}, {"course": 1, "topic": 1, "description": 1}))
+
+@app.get("/requests/similar")
+async def similar_requests(
+    course: str = "", topic: str = "", description: str = "", k: int = 5, user=Depends(auth_user)
+):
+    """Top-k open requests most similar to the given (draft) course/topic/description."""
+    if not 0 < k <= 20:
+        raise HTTPException(400, "k must be between 1 and 20")
+    ranked = similar_index.similar(normalize_course(course), topic, description, k=k)
+    if not ranked:
+        return []
+    scores = dict(ranked)
+    docs = {d["_id"]: d for d in db.requests.find(
+        {"_id": {"$in": list(scores)}, "status": "open"}, REQUEST_SUMMARY)}
+    out = [{**docs[rid], "similarity": score} for rid, score in ranked if rid in docs]
+    return JSONResponse(content=jsonable_encoder(out, custom_encoder={ObjectId: str}))
+
+
+
+# --- Points leaderboard ---
+@periodic(300)
+def _load_leaderboard():
+    # cold start from the users.points index; re-running it reconciles with writes from other workers
+    leaderboard.load((u["_id"], u.get("points", 0))
+                     for u in db.users.find({}, {"points": 1}).sort("points", -1))
+
+@app.get("/leaderboard")
+async def get_leaderboard(limit: int = 10, user=Depends(auth_user)):
+    if not 0 < limit <= 100:
+        raise HTTPException(400, "limit must be between 1 and 100")
+    top = leaderboard.top(limit)
+    names = {u["_id"]: u for u in db.users.find(
+        {"_id": {"$in": [uid for _, uid, _ in top]}}, {"name": 1, "avatarUrl": 1})}
+    out = [
+        {"rank": rank, "_id": str(uid), "points": pts,
+         "name": names.get(uid, {}).get("name"), "avatarUrl": names.get(uid, {}).get("avatarUrl")}
+        for rank, uid, pts in top
+    ]
+    return out
+
+@app.get("/me/rank")
+async def my_rank(user=Depends(auth_user)):
+    me = _user_or_404(user)
+    rank = leaderboard.rank(me["_id"])
+    if rank is None:
+        # not loaded yet on this worker (e.g. right after startup)
+        leaderboard.set(me["_id"], me.get("points", 0))
+        rank = leaderboard.rank(me["_id"])
+    return {"rank": rank, "points": leaderboard.points(me["_id"]), "of": len(leaderboard)}
+
+
+
 # --- Create a request ---
 @app.post("/requests")
 async def create_request(payload: dict, user=Depends(auth_user)):
@@ -376,7 +1596,7 @@ async def create_request(payload: dict, user=Depends(auth_user)):
     if not student:
         raise HTTPException(400, "User not found")
 
-    course = (payload.get("course") or "").trim() if hasattr("", "trim") else (payload.get("course") or "").strip()
+    course = normalize_course(payload.get("course") or "")
     topic = (payload.get("topic") or "").strip()
     description = (payload.get("description") or "").strip()   # <— ADD THIS
     raw_points = payload.get("pointsOffered", 20)
@@ -401,7 +1621,17 @@ async def create_request(payload: dict, user=Depends(auth_user)):
         "link": None,
         "createdAt": datetime.utcnow(),
     }
-    r = db.requests.insert_one(doc)
+    doc["hotScore"] = _hot_score(points, doc["createdAt"])
+    doc["expiresAt"] = doc["createdAt"] + timedelta(days=settings.REQUEST_TTL_DAYS)
+    with _request_write() as stamped:
+        doc.update(stamped({})["$set"])  # updatedAt + version
+        r = db.requests.insert_one(doc)
+    analytics.record(db.stats_daily, course, doc["createdAt"], created=1)
+    db.users.update_one({"_id": student["_id"]}, {"$inc": {"stats.requestsCreated": 1}})
+    _next_version("users")
+    course_index.add(course)
+    match_index.add_open(doc)  # insert_one filled in doc["_id"]
+    similar_index.add(doc)
     await broadcast({"type": "request:created", "rid": str(r.inserted_id)})
     return {"_id": str(r.inserted_id)}
 
@@ -419,13 +1649,21 @@ async def accept_request(rid: str, user=Depends(auth_user)):
         raise HTTPException(403, "You cannot accept your own request")
 
     link = f"https://meet.jit.si/peerfect-{rid}"
-    res = db.requests.update_one(
-        {"_id": ObjectId(rid), "status": "open"},
-        {"$set": {"status": "accepted", "tutorId": tutor["_id"], "link": link, "acceptedAt": datetime.utcnow()}}
-    )
+    with _request_write() as stamped:
+        res = db.requests.update_one(
+            {"_id": ObjectId(rid), "status": "open"},
+            stamped({"$set": {"status": "accepted", "tutorId": tutor["_id"], "link": link, "acceptedAt": datetime.utcnow()}},
+                    moved=("open", "accepted"))
+        )
     if not res.modified_count:
         raise HTTPException(400, "Cannot accept (already accepted)")
+    analytics.record(db.stats_daily, req.get("course"), datetime.utcnow(), accepted=1)
+    db.users.update_one({"_id": tutor["_id"]}, {"$inc": {"stats.requestsTutored": 1}})
+    _next_version("users")
+    match_index.remove_open(ObjectId(rid))
+    similar_index.remove(ObjectId(rid))
     await broadcast({"type":"request:accepted","rid":rid})
+    await _notify(_notification_rows([req["studentId"]], "request:accepted", req))
     return {"ok": True, "link": link}
 
 
@@ -437,18 +1675,22 @@ async def complete_request(rid: str, user=Depends(auth_user)):
     if not caller: raise HTTPException(400, "User not found")
 
     # Atomically flip accepted ➜ completed one time only
-    r_before = db.requests.find_one_and_update(
-        {"_id": ObjectId(rid), "status": "accepted"},
-        {"$set": {"status": "completed", "completedAt": datetime.utcnow()}},
-        return_document=ReturnDocument.BEFORE,
-    )
+    with _request_write() as stamped:
+        r_before = db.requests.find_one_and_update(
+            {"_id": ObjectId(rid), "status": "accepted"},
+            stamped({"$set": {"status": "completed", "completedAt": datetime.utcnow()}},
+                    moved=("accepted", "completed")),
+            return_document=ReturnDocument.BEFORE,
+        )
     if not r_before:
         raise HTTPException(400, "Request is not in accepted state")
 
     if r_before["studentId"] != caller["_id"]:
         # roll back status if wrong caller
-        db.requests.update_one({"_id": ObjectId(rid), "status": "completed"},
-                               {"$set": {"status": "accepted"}, "$unset": {"completedAt": ""}})
+        with _request_write() as stamped:
+            db.requests.update_one({"_id": ObjectId(rid), "status": "completed"},
+                                   stamped({"$set": {"status": "accepted"}, "$unset": {"completedAt": ""}},
+                                           moved=("completed", "accepted")))
         raise HTTPException(403, "Only the student who created this request can complete it")
 
     student = db.users.find_one({"_id": r_before["studentId"]})
@@ -462,18 +1704,153 @@ async def complete_request(rid: str, user=Depends(auth_user)):
     if s_pts < pts: raise HTTPException(400, "Insufficient student points")
 
     s_new, t_new = s_pts - pts, t_pts + pts
-    db.users.update_one({"_id": student["_id"]}, {"$set": {"points": s_new}})
-    db.users.update_one({"_id": tutor["_id"]},   {"$set": {"points": t_new}})
+    # counters ride along in the same single-doc update as the points
+    db.users.update_one({"_id": student["_id"]},
+                        {"$set": {"points": s_new}, "$inc": {"stats.sessionsCompleted": 1}})
+    db.users.update_one({"_id": tutor["_id"]},
+                        {"$set": {"points": t_new}, "$inc": {"stats.sessionsCompleted": 1}})
+    _next_version("users")
+    leaderboard.set(student["_id"], s_new)
+    leaderboard.set(tutor["_id"], t_new)
+    analytics.record(db.stats_daily, r_before.get("course"), datetime.utcnow(), completed=1, pointsMoved=pts)
 
     # (Optional) ledger row for audit
     # db.ledger.insert_one({ ... })
 
+    match_index.add_completed(tutor["_id"], r_before.get("course"))
+
     await broadcast({"type":"request:completed","rid":rid})
     await broadcast({"type":"user:points_changed"})
+    await _notify(_notification_rows([tutor["_id"]], "request:completed", r_before, points=pts))
 
     return {"ok": True, "studentPoints": s_new, "tutorPoints": t_new, "callerPoints": s_new}
 
 
+# --- Daily rollups per course (see services/analytics.py) ---
+@app.get("/stats/daily")
+async def daily_stats(
+    from_: str = Query(..., alias="from"),  # YYYY-MM-DD, inclusive
+    to: str = Query(...),                   # YYYY-MM-DD, inclusive
+    course: Optional[str] = None,
+    user=Depends(auth_user),
+):
+    lo, hi = _parse_utc(from_, "from"), _parse_utc(to, "to")
+    if hi < lo:
+        raise HTTPException(400, "to must not be before from")
+    if hi - lo > timedelta(days=366):
+        raise HTTPException(400, "range is limited to one year")
+    q: Dict[str, Any] = {"day": {"$gte": analytics.day_key(lo), "$lte": analytics.day_key(hi)}}
+    if course:
+        q["course"] = normalize_course(course)
+    rows = db.stats_daily.find(q, {"_id": 0, "rebuiltAt": 0}).sort([("day", 1), ("course", 1)])
+    return list(rows)
+
+# --- Rate the tutor of a completed request (student only, once) ---
+@jobs.handler("rating:recompute")
+def _recompute_rating(payload: dict):
+    # recomputed from the rated requests rather than $inc'd, so a retried job can't double-count
+    tutor_id = payload["tutorId"]
+    total = count = 0
+    for coll in request_history:
+        for g in coll.aggregate([
+            {"$match": {"tutorId": tutor_id, "status": "completed", "rating": {"$exists": True}}},
+            {"$group": {"_id": None, "sum": {"$sum": "$rating"}, "count": {"$sum": 1}}},
+        ]):
+            total, count = total + g["sum"], count + g["count"]
+    if not count:
+        return
+    db.users.update_one({"_id": tutor_id}, {"$set": {
+        "stats.ratingSum": total, "stats.ratingCount": count, "rating": total / count,
+    }})
+    _next_version("users")
+
+@app.post("/requests/{rid}/rating")
+async def rate_request(rid: str, payload: dict = Body(...), user=Depends(auth_user)):
+    me = _user_or_404(user)
+    try:
+        score = int(payload.get("score"))
+    except (TypeError, ValueError):
+        raise HTTPException(400, "score must be an integer")
+    if not 1 <= score <= 5:
+        raise HTTPException(400, "score must be between 1 and 5")
+
+    flt = {"_id": ObjectId(rid), "status": "completed", "studentId": me["_id"], "rating": {"$exists": False}}
+    req = None
+    with _request_write() as stamped:
+        update = stamped({"$set": {"rating": score, "ratedAt": datetime.utcnow()}})
+        # archived requests can still get their first rating
+        for coll in request_history:
+            req = coll.find_one_and_update(flt, update)
+            if req:
+                break
+    if not req:
+        raise HTTPException(400, "Only the student can rate a completed request, once")
+
+    jobs.enqueue("rating:recompute", {"tutorId": req["tutorId"]})
+    await broadcast({"type": "request:rated", "rid": rid})
+    await _notify(_notification_rows([req["tutorId"]], "request:rated", req, score=score))
+    return {"ok": True, "rating": score}
+
+
+
+# --- Per-request chat ---
+MESSAGE_MAX_LEN = 2000
+MESSAGES_MAX_LIMIT = 100
+
+def request_participant(rid: str, user=Depends(auth_user)) -> tuple:
+    """Dependency for request-scoped routes: (me, request), 403 unless a participant."""
+    me = _user_or_404(user)
+    # archived requests keep their chat
+    req = next((r for r in (coll.find_one({"_id": _oid(rid)}, {"studentId": 1, "tutorId": 1, "status": 1})
+                            for coll in request_history) if r), None)
+    if not req: raise HTTPException(404, "Request not found")
+    _ensure_participant(req, me["_id"])
+    return me, req
+
+def _message_cursor(m) -> str:
+    return f"{int(m['createdAt'].replace(tzinfo=timezone.utc).timestamp() * 1000)}-{m['_id']}"
+
+@app.get("/requests/{rid}/messages")
+async def list_messages(before: Optional[str] = None, limit: int = 50, ctx=Depends(request_participant)):
+    _, req = ctx
+    limit = max(1, min(limit, MESSAGES_MAX_LIMIT))
+    q: Dict[str, Any] = {"rid": req["_id"]}
+    if before:
+        # cursor = "<createdAt ms>-<id>" of the oldest message already shown
+        try:
+            ms, mid = before.split("-", 1)
+            at, mid = datetime.utcfromtimestamp(int(ms) / 1000), ObjectId(mid)
+        except Exception:
+            raise HTTPException(400, "Invalid cursor")
+        q["$or"] = [{"createdAt": {"$lt": at}}, {"createdAt": at, "_id": {"$lt": mid}}]
+    items = list(db.messages.find(q, {"rid": 0}).sort([("createdAt", -1), ("_id", -1)]).limit(limit))
+    return JSONResponse(content=jsonable_encoder({
+        "items": items,  # newest first
+        "next": _message_cursor(items[-1]) if len(items) == limit else None,
+    }, custom_encoder={ObjectId: str}))
+
+@app.post("/requests/{rid}/messages")
+async def post_message(payload: dict = Body(...), ctx=Depends(request_participant)):
+    me, req = ctx
+    text = (payload.get("text") or "").strip()
+    if not text:
+        raise HTTPException(400, "text is required")
+    if len(text) > MESSAGE_MAX_LEN:
+        raise HTTPException(400, "Message too long")
+    if not req.get("tutorId"):
+        raise HTTPException(400, "Chat opens once a tutor accepts the request")
+
+    now = datetime.utcnow()
+    msg = {"rid": req["_id"], "senderId": me["_id"], "text": text,
+           # ms precision, like Mongo stores it, so the cursor round-trips exactly
+           "createdAt": now.replace(microsecond=now.microsecond // 1000 * 1000)}
+    db.messages.insert_one(msg)
+    out = jsonable_encoder(msg, custom_encoder={ObjectId: str})
+    # only the two participants' streams, not every subscriber
+    await broadcast({"type": "message", "message": out},
+                    to={u for u in (req.get("studentId"), req.get("tutorId")) if u})
+    return out
+
 
 # Event
 @app.get("/events")
@@ -481,8 +1858,9 @@ async def sse_events(user=Depends(auth_user)):
     """
     Server-Sent Events stream. Client connects via EventSource(`${API}/events?access_token=...`).
     """
+    me = db.users.find_one({"auth0Sub": user.get("sub")}, {"_id": 1})
     queue: asyncio.Queue = asyncio.Queue()
-    subscribers.add(queue)
+    _subscribe(queue, me["_id"] if me else None)
 
     async def event_stream():
         try:
@@ -496,7 +1874,7 @@ async def sse_events(user=Depends(auth_user)):
         except asyncio.CancelledError:
             pass
         finally:
-            subscribers.discard(queue)
+            _unsubscribe(queue)
 
     async def _keepalive(q: asyncio.Queue):
         while True:
@@ -0,0 +1,92 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from pymongo import UpdateOne
+from pymongo.collection import Collection
+
+# counter -> request timestamp field it is bucketed by
+EVENTS = {
+    "created": "createdAt",
+    "accepted": "acceptedAt",
+    "completed": "completedAt",
+    "expired": "expiredAt",
+}
+
+
+def day_key(at: datetime) -> str:
+    return at.strftime("%Y-%m-%d")  # UTC day, like every stored timestamp
+
+
+def ensure_indexes(stats: Collection):
+    stats.create_index([("course", 1), ("day", 1)], unique=True)
+    stats.create_index("day")
+
+
+def record(stats: Collection, course: Optional[str], at: datetime, **counts: int):
+    """$inc counters (created=1, pointsMoved=20, ...) on the (course, day) rollup."""
+    stats.update_one(
+        {"course": course or "", "day": day_key(at)},
+        {"$inc": counts},
+        upsert=True,
+    )
+
+
+def record_many(stats: Collection, at: datetime, event: str, courses: Iterable[Optional[str]]):
+    """One $inc per course for a batch of same-event transitions (e.g. an expiry sweep)."""
+    per_course: Dict[str, int] = defaultdict(int)
+    for c in courses:
+        per_course[c or ""] += 1
+    if per_course:
+        stats.bulk_write([
+            UpdateOne({"course": c, "day": day_key(at)}, {"$inc": {event: n}}, upsert=True)
+            for c, n in per_course.items()
+        ], ordered=False)
+
+
+def backfill(sources: Iterable[Collection], stats: Collection, batch_size: int = 1000) -> int:
+    """
+    Rebuild every rollup from request history. Requests are read in _id order,
+    `batch_size` at a time; the (course, day) totals are small enough to hold
+    in memory and replace the stored counters in one pass at the end.
+    Transitions recorded while this runs may be overwritten, so run it quietly.
+    """
+    started = datetime.utcnow()
+    totals: Dict[Tuple[str, str], Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    fields = {"course": 1, "pointsOffered": 1, **{f: 1 for f in EVENTS.values()}}
+    for coll in sources:
+        last = None
+        while True:
+            q = {"_id": {"$gt": last}} if last is not None else {}
+            docs = list(coll.find(q, fields).sort("_id", 1).limit(batch_size))
+            if not docs:
+                break
+            for d in docs:
+                course = d.get("course") or ""
+                for event, field in EVENTS.items():
+                    at = d.get(field)
+                    if isinstance(at, datetime):
+                        totals[(course, day_key(at))][event] += 1
+                if isinstance(d.get("completedAt"), datetime):
+                    totals[(course, day_key(d["completedAt"]))]["pointsMoved"] += int(d.get("pointsOffered") or 0)
+            last = docs[-1]["_id"]
+
+    ops = [
+        UpdateOne({"course": course, "day": day},
+                  {"$set": {**{e: counts.get(e, 0) for e in (*EVENTS, "pointsMoved")}, "rebuiltAt": started}},
+                  upsert=True)
+        for (course, day), counts in totals.items()
+    ]
+    for i in range(0, len(ops), batch_size):
+        stats.bulk_write(ops[i:i + batch_size], ordered=False)
+    # rollups with no history behind them (today's are left to the live $incs)
+    stats.delete_many({"rebuiltAt": {"$ne": started}, "day": {"$lt": day_key(started)}})
+    return len(ops)
+
+
+if __name__ == "__main__":
+    # python -m backend.services.analytics  -> rebuild stats_daily from requests + requests_archive
+    from backend.main import db, request_history
+
+    n = backfill(request_history, db.stats_daily)
+    print(f"✅ Rebuilt {n} daily rollups")
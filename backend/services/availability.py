@@ -0,0 +1,144 @@
+"""
+Weekly availability windows and mutual free-time search.
+
+Windows are stored in the user's own timezone ({"day": 0-6 (Mon-Sun),
+"start": "HH:MM", "end": "HH:MM"}) and expanded to concrete naive-UTC
+intervals for a date range, so DST shifts land where the user expects.
+All interval helpers take and return sorted, non-overlapping lists.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+Interval = Tuple[datetime, datetime]
+
+MAX_WINDOWS = 50
+
+
+def _minutes(hhmm: str) -> int:
+    h, m = hhmm.split(":")
+    h, m = int(h), int(m)
+    if not (0 <= h <= 24 and 0 <= m < 60) or h * 60 + m > 24 * 60:
+        raise ValueError(hhmm)
+    return h * 60 + m
+
+
+def validate(tz: str, windows: Iterable[dict]) -> List[dict]:
+    """Clean up user input; raises ValueError with a readable message."""
+    try:
+        ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"unknown timezone: {tz}")
+    out = []
+    for w in windows:
+        try:
+            if not isinstance(w["start"], str) or not isinstance(w["end"], str):
+                raise TypeError
+            day = int(w["day"])
+            start, end = _minutes(w["start"]), _minutes(w["end"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("each window needs day (0-6), start and end (HH:MM)")
+        if not 0 <= day <= 6:
+            raise ValueError("day must be 0 (Mon) .. 6 (Sun)")
+        if end <= start:
+            raise ValueError("window end must be after start")
+        out.append({"day": day, "start": w["start"], "end": w["end"]})
+    if len(out) > MAX_WINDOWS:
+        raise ValueError(f"at most {MAX_WINDOWS} windows")
+    return sorted(out, key=lambda w: (w["day"], _minutes(w["start"])))
+
+
+def merge(intervals: Iterable[Interval]) -> List[Interval]:
+    out: List[Interval] = []
+    for s, e in sorted(intervals):
+        if out and s <= out[-1][1]:
+            if e > out[-1][1]:
+                out[-1] = (out[-1][0], e)
+        else:
+            out.append((s, e))
+    return out
+
+
+def expand(tz: str, windows: List[dict], lo: datetime, hi: datetime) -> List[Interval]:
+    """Concrete UTC intervals of the weekly windows inside [lo, hi)."""
+    zone = ZoneInfo(tz)
+    by_day = {}
+    for w in windows:
+        by_day.setdefault(w["day"], []).append((_minutes(w["start"]), _minutes(w["end"])))
+    out = []
+    # walk local calendar days covering the range (one extra on each side for offsets)
+    day = (lo.replace(tzinfo=timezone.utc).astimezone(zone) - timedelta(days=1)).date()
+    last = (hi.replace(tzinfo=timezone.utc).astimezone(zone) + timedelta(days=1)).date()
+    while day <= last:
+        for start, end in by_day.get(day.weekday(), ()):
+            midnight = datetime(day.year, day.month, day.day, tzinfo=zone)
+            s = (midnight + timedelta(minutes=start)).astimezone(timezone.utc).replace(tzinfo=None)
+            e = (midnight + timedelta(minutes=end)).astimezone(timezone.utc).replace(tzinfo=None)
+            s, e = max(s, lo), min(e, hi)
+            if s < e:
+                out.append((s, e))
+        day += timedelta(days=1)
+    return merge(out)
+
+
+def subtract(free: List[Interval], busy: List[Interval]) -> List[Interval]:
+    """free minus busy, one pass over both sorted lists."""
+    out: List[Interval] = []
+    busy = merge(busy)
+    j = 0
+    for s, e in free:
+        while j < len(busy) and busy[j][1] <= s:
+            j += 1
+        k, cur = j, s
+        while k < len(busy) and busy[k][0] < e:
+            if busy[k][0] > cur:
+                out.append((cur, busy[k][0]))
+            cur = max(cur, busy[k][1])
+            k += 1
+        if cur < e:
+            out.append((cur, e))
+    return out
+
+
+def intersect(a: List[Interval], b: List[Interval]) -> List[Interval]:
+    """Sweep both sorted lists with two pointers."""
+    out: List[Interval] = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        s, e = max(a[i][0], b[j][0]), min(a[i][1], b[j][1])
+        if s < e:
+            out.append((s, e))
+        if a[i][1] < b[j][1]:
+            i += 1
+        else:
+            j += 1
+    return out
+
+
+def slots(free: List[Interval], duration: timedelta, n: int,
+          step: timedelta = timedelta(minutes=15)) -> List[Interval]:
+    """Earliest `n` slots of `duration`, starts rounded up to `step`."""
+    out: List[Interval] = []
+    step_s = step.total_seconds()
+    for s, e in free:
+        # round the first start up to the grid (epoch-aligned, so :00/:15/:30/:45)
+        secs = (s - datetime(1970, 1, 1)).total_seconds()
+        cur = s + timedelta(seconds=(-secs) % step_s)
+        while cur + duration <= e:
+            out.append((cur, cur + duration))
+            if len(out) >= n:
+                return out
+            cur += duration
+    return out
+
+
+def mutual_slots(
+    a: Optional[dict], b: Optional[dict], busy_a: List[Interval], busy_b: List[Interval],
+    lo: datetime, hi: datetime, duration: timedelta, n: int,
+) -> List[Interval]:
+    """a/b are users' availability docs ({"tz", "windows"}); missing availability means no slots."""
+    if not a or not b or not a.get("windows") or not b.get("windows"):
+        return []
+    free_a = subtract(expand(a.get("tz") or "UTC", a["windows"], lo, hi), busy_a)
+    free_b = subtract(expand(b.get("tz") or "UTC", b["windows"], lo, hi), busy_b)
+    return slots(intersect(free_a, free_b), duration, n)
@@ -0,0 +1,146 @@
+"""
+BSON -> JSON transcoder for read-only endpoints.
+
+Walks raw BSON bytes (RawBSONDocument.raw) and writes JSON text directly, so
+documents never become Python dicts. Output matches what
+jsonable_encoder(..., custom_encoder={ObjectId: str}) + JSONResponse produce:
+ObjectIds as hex strings, datetimes as naive ISO 8601.
+"""
+import json
+import struct
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+import bson
+from bson import ObjectId
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+from fastapi.encoders import jsonable_encoder
+
+RAW = CodecOptions(document_class=RawBSONDocument)
+
+_EPOCH = datetime(1970, 1, 1)
+_encode_str = json.encoder.encode_basestring
+_i32 = struct.Struct("<i").unpack_from
+_i64 = struct.Struct("<q").unpack_from
+_f64 = struct.Struct("<d").unpack_from
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def _cstring(buf: bytes, pos: int):
+    end = buf.index(b"\x00", pos)
+    return buf[pos:end].decode(), end + 1
+
+
+def _value(buf: bytes, t: int, pos: int, out: List[str]) -> int:
+    if t == 0x02:  # string
+        n = _i32(buf, pos)[0]
+        out.append(_encode_str(buf[pos + 4:pos + 3 + n].decode()))
+        return pos + 4 + n
+    if t == 0x07:  # ObjectId
+        out.append('"' + buf[pos:pos + 12].hex() + '"')
+        return pos + 12
+    if t == 0x10:  # int32
+        out.append(str(_i32(buf, pos)[0]))
+        return pos + 4
+    if t == 0x12:  # int64
+        out.append(str(_i64(buf, pos)[0]))
+        return pos + 8
+    if t == 0x09:  # UTC datetime (ms)
+        out.append('"' + (_EPOCH + timedelta(milliseconds=_i64(buf, pos)[0])).isoformat() + '"')
+        return pos + 8
+    if t == 0x0A:  # null
+        out.append("null")
+        return pos
+    if t == 0x08:  # bool
+        out.append("true" if buf[pos] else "false")
+        return pos + 1
+    if t == 0x01:  # double
+        f = _f64(buf, pos)[0]
+        if f != f or f in (float("inf"), float("-inf")):
+            raise _Unsupported("non-finite double")
+        out.append(repr(f))
+        return pos + 8
+    if t == 0x03:  # embedded document
+        return _document(buf, pos, out, array=False)
+    if t == 0x04:  # array
+        return _document(buf, pos, out, array=True)
+    raise _Unsupported(f"BSON type 0x{t:02x}")
+
+
+def _document(buf: bytes, pos: int, out: List[str], array: bool) -> int:
+    end = pos + _i32(buf, pos)[0] - 1  # index of the trailing NUL
+    pos += 4
+    out.append("[" if array else "{")
+    first = True
+    while pos < end:
+        t = buf[pos]
+        key, pos = _cstring(buf, pos + 1)
+        if not first:
+            out.append(",")
+        first = False
+        if not array:
+            out.append(_encode_str(key) + ":")
+        pos = _value(buf, t, pos, out)
+    out.append("]" if array else "}")
+    return end + 1
+
+
+def _fallback(raw: bytes) -> str:
+    doc = bson.decode(raw)
+    return json.dumps(jsonable_encoder(doc, custom_encoder={ObjectId: str}),
+                      ensure_ascii=False, separators=(",", ":"))
+
+
+def to_json(raw: bytes) -> str:
+    """One raw BSON document as JSON text."""
+    out: List[str] = []
+    try:
+        _document(raw, 0, out, array=False)
+    except _Unsupported:
+        return _fallback(raw)
+    return "".join(out)
+
+
+_FIXED = {0x01: 8, 0x07: 12, 0x08: 1, 0x09: 8, 0x0A: 0, 0x10: 4, 0x11: 8, 0x12: 8, 0x13: 16}
+
+
+def _skip(buf: bytes, t: int, pos: int) -> int:
+    if t in _FIXED:
+        return pos + _FIXED[t]
+    if t in (0x02, 0x03, 0x04):
+        n = _i32(buf, pos)[0]
+        return pos + (4 + n if t == 0x02 else n)
+    if t == 0x05:  # binary: length, subtype, bytes
+        return pos + 5 + _i32(buf, pos)[0]
+    raise _Unsupported(f"BSON type 0x{t:02x}")
+
+
+def field_to_json(raw: bytes, name: str) -> Optional[str]:
+    """JSON text of one top-level field of a raw document (None if absent)."""
+    end = len(raw) - 1
+    pos = 4
+    try:
+        while pos < end:
+            t = raw[pos]
+            key, pos = _cstring(raw, pos + 1)
+            if key == name:
+                out: List[str] = []
+                _value(raw, t, pos, out)
+                return "".join(out)
+            pos = _skip(raw, t, pos)
+    except _Unsupported:
+        doc = bson.decode(raw)
+        if name not in doc:
+            return None
+        return json.dumps(jsonable_encoder(doc[name], custom_encoder={ObjectId: str}),
+                          ensure_ascii=False, separators=(",", ":"))
+    return None
+
+
+def array_to_json(cursor) -> bytes:
+    """Render a cursor of RawBSONDocuments as a JSON array body."""
+    return ("[" + ",".join(to_json(d.raw) for d in cursor) + "]").encode()
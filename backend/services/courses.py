@@ -0,0 +1,55 @@
+import re
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Tuple
+
+_SEPARATORS = re.compile(r"[\s\-_./]+")
+_DEPT_NUMBER = re.compile(r"^([A-Z]+) ?(\d)")
+
+
+def normalize_course(raw: str) -> str:
+    """
+    Canonical course code: "comp182", "COMP-182" and " Comp 182 " all become
+    "COMP 182". Also safe on partial input, so it doubles as a prefix normalizer.
+    """
+    s = _SEPARATORS.sub(" ", (raw or "").strip().upper())
+    return _DEPT_NUMBER.sub(r"\1 \2", s)
+
+
+class CourseIndex:
+    """
+    Known course codes in a sorted array (prefix lookups are a bisect plus a
+    scan of the matching run) with per-course usage counts.
+    """
+
+    def __init__(self):
+        self._codes: List[str] = []
+        self._counts: Dict[str, int] = {}
+
+    def __len__(self):
+        return len(self._codes)
+
+    def load(self, counts: Iterable[Tuple[str, int]]):
+        merged: Dict[str, int] = {}
+        for code, n in counts:
+            code = normalize_course(code)
+            if code:
+                merged[code] = merged.get(code, 0) + n
+        # swap both at once; suggest() may be reading from another thread
+        self._codes, self._counts = sorted(merged), merged
+
+    def add(self, code: str, n: int = 1):
+        if code not in self._counts:
+            insort(self._codes, code)
+            self._counts[code] = 0
+        self._counts[code] += n
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Dict[str, object]]:
+        prefix = normalize_course(prefix)
+        codes, counts = self._codes, self._counts
+        i = bisect_left(codes, prefix)
+        hits = []
+        while i < len(codes) and codes[i].startswith(prefix):
+            hits.append(codes[i])
+            i += 1
+        hits.sort(key=lambda c: (-counts.get(c, 0), c))
+        return [{"course": c, "count": counts.get(c, 0)} for c in hits[:limit]]
@@ -0,0 +1,143 @@
+import asyncio
+import inspect
+import socket
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.collection import Collection
+
+
+class JobQueue:
+    """
+    Durable jobs in a Mongo collection, run by a pool of asyncio workers.
+
+    A job is claimed with one find_one_and_update that flips it to `running`
+    and pushes its `runAt` forward by the lease; a worker that dies mid-job
+    simply lets the lease lapse and the job becomes claimable again. So
+    delivery is at-least-once: handlers must be safe to re-run.
+    Failures are retried with exponential backoff up to `maxAttempts`.
+    """
+
+    def __init__(self, coll: Collection, lease: timedelta = timedelta(minutes=5),
+                 poll_seconds: float = 2.0, keep_done: timedelta = timedelta(days=7)):
+        self.coll = coll
+        self.lease = lease
+        self.poll_seconds = poll_seconds
+        self.keep_done = keep_done
+        self.worker_id = f"{socket.gethostname()}:{id(self):x}"
+        self._handlers: Dict[str, Callable[[dict], Any]] = {}
+        self._wake: Optional[asyncio.Event] = None
+        self.done = 0
+        self.failed = 0
+        self.retried = 0
+
+    def ensure_indexes(self):
+        # one index serves both fresh jobs and running jobs whose lease ran out
+        self.coll.create_index([("status", ASCENDING), ("runAt", ASCENDING)])
+        self.coll.create_index(
+            "finishedAt", expireAfterSeconds=int(self.keep_done.total_seconds()),
+            partialFilterExpression={"status": "done"},
+        )
+
+    def handler(self, kind: str):
+        """Register a handler (sync -> worker thread, or async) for a job kind."""
+        def deco(fn):
+            self._handlers[kind] = fn
+            return fn
+        return deco
+
+    # --- producer side ---
+    def enqueue(self, kind: str, payload: Optional[dict] = None, delay: float = 0,
+                max_attempts: int = 5) -> ObjectId:
+        now = datetime.utcnow()
+        job = {
+            "kind": kind,
+            "payload": payload or {},
+            "status": "queued",
+            "runAt": now + timedelta(seconds=delay),
+            "attempts": 0,
+            "maxAttempts": max_attempts,
+            "createdAt": now,
+        }
+        self.coll.insert_one(job)
+        if self._wake is not None and not delay and self._on_loop():
+            self._wake.set()  # an idle worker picks it up now instead of at the next poll
+        return job["_id"]
+
+    @staticmethod
+    def _on_loop() -> bool:
+        try:
+            asyncio.get_running_loop()
+            return True
+        except RuntimeError:  # enqueued from a worker thread: the next poll finds it
+            return False
+
+    # --- consumer side ---
+    def _claim(self) -> Optional[dict]:
+        now = datetime.utcnow()
+        return self.coll.find_one_and_update(
+            {"status": {"$in": ["queued", "running"]}, "runAt": {"$lte": now},
+             "kind": {"$in": list(self._handlers)}},
+            {"$set": {"status": "running", "runAt": now + self.lease, "worker": self.worker_id,
+                      "startedAt": now},
+             "$inc": {"attempts": 1}},
+            sort=[("runAt", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def _finish(self, job: dict, error: Optional[str]):
+        # fenced on `attempts`: a worker whose lease lapsed and got re-claimed can't overwrite it
+        fence = {"_id": job["_id"], "status": "running", "attempts": job["attempts"]}
+        now = datetime.utcnow()
+        if error is None:
+            self.coll.update_one(fence, {"$set": {"status": "done", "finishedAt": now},
+                                         "$unset": {"lastError": ""}})
+            self.done += 1
+        elif job["attempts"] >= job.get("maxAttempts", 5):
+            self.coll.update_one(fence, {"$set": {"status": "failed", "finishedAt": now, "lastError": error}})
+            self.failed += 1
+        else:
+            backoff = min(2 ** job["attempts"] * 5, 3600)  # 10s, 20s, 40s ... capped at an hour
+            self.coll.update_one(fence, {"$set": {"status": "queued", "lastError": error,
+                                                  "runAt": now + timedelta(seconds=backoff)}})
+            self.retried += 1
+
+    async def _run_one(self, job: dict):
+        fn = self._handlers[job["kind"]]
+        try:
+            if inspect.iscoroutinefunction(fn):
+                await fn(job["payload"])
+            else:
+                await asyncio.to_thread(fn, job["payload"])
+            error = None
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            print(f"❌ Job {job['kind']} {job['_id']} failed:", e)
+        await asyncio.to_thread(self._finish, job, error)
+
+    async def _worker(self):
+        while True:
+            try:
+                job = await asyncio.to_thread(self._claim)
+            except Exception as e:
+                print("❌ Job claim failed:", e)
+                job = None
+            if job is None:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run_one(job)
+
+    def start(self, concurrency: int) -> List[asyncio.Task]:
+        """Spawn the worker pool on the running loop; cancel the tasks to stop."""
+        self._wake = asyncio.Event()
+        return [asyncio.create_task(self._worker()) for _ in range(concurrency)]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"done": self.done, "failed": self.failed, "retried": self.retried,
+                "queued": self.coll.count_documents({"status": "queued"})}
@@ -0,0 +1,123 @@
+import bisect
+import threading
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class Leaderboard:
+    """
+    Points leaderboard backed by a Fenwick tree over point values (how many
+    users hold each value). Updating a user, "my rank" and finding the k-th
+    best score are all O(log P), P being the highest point value seen.
+    Ties share a rank: rank = 1 + number of users with strictly more points.
+    Each tie is kept as a sorted list so `top` never sorts a big one.
+    """
+
+    def __init__(self, size: int = 1024):
+        self._lock = threading.Lock()
+        self._reset(size)
+
+    def _reset(self, size: int):
+        self._size = size
+        self._tree = [0] * (size + 1)  # 1-based; value v lives at index v + 1
+        self._points: Dict[Hashable, int] = {}
+        self._holders: Dict[int, List[Hashable]] = {}  # sorted uids per value
+
+    def __len__(self):
+        return len(self._points)
+
+    # --- Fenwick primitives (caller holds the lock) ---
+    def _add(self, value: int, delta: int):
+        i = value + 1
+        while i <= self._size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def _count_upto(self, value: int) -> int:
+        """Users with points <= value."""
+        i, total = min(value + 1, self._size), 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _kth(self, k: int) -> int:
+        """Point value of the k-th lowest user (1-based)."""
+        pos, step = 0, 1 << self._size.bit_length()
+        while step:
+            nxt = pos + step
+            if nxt <= self._size and self._tree[nxt] < k:
+                pos = nxt
+                k -= self._tree[nxt]
+            step >>= 1
+        return pos  # index pos + 1 holds value pos
+
+    def _grow(self, value: int):
+        size = self._size
+        while value + 1 > size:
+            size *= 2
+        # only the tree depends on the size; points and ties carry over
+        self._size, self._tree = size, [0] * (size + 1)
+        for p, holders in self._holders.items():
+            self._add(p, len(holders))
+
+    def _insert(self, uid: Hashable, points: int):
+        if points + 1 > self._size:
+            self._grow(points)
+        self._points[uid] = points
+        bisect.insort(self._holders.setdefault(points, []), uid)
+        self._add(points, 1)
+
+    def _remove(self, uid: Hashable):
+        old = self._points.pop(uid, None)
+        if old is None:
+            return
+        holders = self._holders[old]
+        del holders[bisect.bisect_left(holders, uid)]
+        if not holders:
+            del self._holders[old]
+        self._add(old, -1)
+
+    # --- public API ---
+    def load(self, pairs: Iterable[Tuple[Hashable, int]]):
+        pairs = [(uid, max(int(p or 0), 0)) for uid, p in pairs]
+        top = max((p for _, p in pairs), default=0)
+        with self._lock:
+            self._reset(max(1024, 1 << (top + 1).bit_length()))
+            for uid, p in pairs:
+                self._points[uid] = p
+                self._holders.setdefault(p, []).append(uid)
+                self._add(p, 1)
+            for holders in self._holders.values():
+                holders.sort()  # once per tie instead of an insort per user
+
+    def set(self, uid: Hashable, points: int):
+        with self._lock:
+            self._remove(uid)
+            self._insert(uid, max(int(points), 0))
+
+    def discard(self, uid: Hashable):
+        with self._lock:
+            self._remove(uid)
+
+    def rank(self, uid: Hashable) -> Optional[int]:
+        with self._lock:
+            p = self._points.get(uid)
+            if p is None:
+                return None
+            return 1 + len(self._points) - self._count_upto(p)
+
+    def points(self, uid: Hashable) -> Optional[int]:
+        return self._points.get(uid)
+
+    def top(self, n: int) -> List[Tuple[int, Hashable, int]]:
+        """Best `n` users as (rank, uid, points); ties ordered by uid."""
+        out: List[Tuple[int, Hashable, int]] = []
+        with self._lock:
+            total = len(self._points)
+            rank = 1
+            while len(out) < n and rank <= total:
+                value = self._kth(total - rank + 1)
+                holders = self._holders[value]
+                out.extend((rank, uid, value) for uid in holders[: n - len(out)])
+                rank += len(holders)
+        return out
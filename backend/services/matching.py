@@ -0,0 +1,94 @@
+import heapq
+import math
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from bson import ObjectId
+
+
+class MatchIndex:
+    """
+    Inverted indexes for tutor -> request matching:
+      course -> ids of open requests in that course
+      tutor  -> how many requests they completed per course
+
+    Built from Mongo and then updated in place as requests are created,
+    accepted and completed, so a recommendation never scans `requests`.
+    The two sides load separately: open requests churn and are reloaded
+    often, tutor history only grows and is reloaded rarely.
+    """
+
+    COURSE_WEIGHT = 2.0  # one completed session in the course outweighs ~4x the points
+    AGE_HOURS = 12
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._open: Dict[ObjectId, dict] = {}
+        self._by_course: Dict[str, Set[ObjectId]] = defaultdict(set)
+        self._tutored: Dict[ObjectId, Counter] = defaultdict(Counter)
+
+    def load_open(self, open_docs: Iterable[dict]):
+        fresh_open, by_course = {}, defaultdict(set)
+        for d in open_docs:
+            fresh_open[d["_id"]] = self._entry(d)
+            by_course[d.get("course")].add(d["_id"])
+        with self._lock:
+            self._open, self._by_course = fresh_open, by_course
+
+    def load_tutored(self, counts: Iterable[Tuple[ObjectId, str, int]]):
+        """counts: (tutorId, course, completed requests); repeated pairs add up."""
+        tutored = defaultdict(Counter)
+        for tutor_id, course, n in counts:
+            if tutor_id and course:
+                tutored[tutor_id][course] += n
+        with self._lock:
+            self._tutored = tutored
+
+    @staticmethod
+    def _entry(d: dict) -> dict:
+        return {
+            "course": d.get("course"),
+            "studentId": d.get("studentId"),
+            "points": int(d.get("pointsOffered") or 0),
+            "createdAt": d.get("createdAt") or datetime.utcnow(),
+        }
+
+    # --- incremental updates ---
+    def add_open(self, doc: dict):
+        with self._lock:
+            self._open[doc["_id"]] = self._entry(doc)
+            self._by_course[doc.get("course")].add(doc["_id"])
+
+    def remove_open(self, rid: ObjectId):
+        with self._lock:
+            e = self._open.pop(rid, None)
+            if e:
+                ids = self._by_course.get(e["course"])
+                if ids:
+                    ids.discard(rid)
+                    if not ids:
+                        del self._by_course[e["course"]]
+
+    def add_completed(self, tutor_id: ObjectId, course: str):
+        with self._lock:
+            self._tutored[tutor_id][course] += 1
+
+    # --- reads ---
+    def recommend(self, tutor_id: ObjectId, limit: int = 20,
+                  now: Optional[datetime] = None) -> List[Tuple[ObjectId, float]]:
+        """Open requests in courses the tutor has completed, best first, as (rid, score)."""
+        now = now or datetime.utcnow()
+        scored = []
+        with self._lock:
+            for course, n in self._tutored.get(tutor_id, {}).items():
+                overlap = self.COURSE_WEIGHT * math.log2(1 + n)
+                for rid in self._by_course.get(course, ()):
+                    e = self._open[rid]
+                    if e["studentId"] == tutor_id:
+                        continue
+                    age_h = (now - e["createdAt"]).total_seconds() / 3600
+                    score = overlap + math.log2(1 + e["points"]) + age_h / self.AGE_HOURS
+                    scored.append((score, rid))
+        return [(rid, round(score, 4)) for score, rid in heapq.nlargest(limit, scored)]
@@ -0,0 +1,69 @@
+import heapq
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+
+Reminder = Tuple[datetime, ObjectId, dict]  # (fire at, schedule id, payload)
+
+
+class ReminderHeap:
+    """
+    Pending session reminders in a min-heap keyed by fire time. Only the next
+    window of sessions is held: `load` swaps in a fresh window (keeping
+    entries the query missed) and `add` covers sessions accepted in between.
+    Superseded entries are dropped lazily when they reach the top, so every
+    operation is O(log n).
+    """
+
+    def __init__(self, lead: timedelta):
+        self.lead = lead
+        self._lock = threading.Lock()
+        self._heap: List[Tuple[datetime, ObjectId]] = []
+        self._live: Dict[ObjectId, Reminder] = {}
+
+    def __len__(self):
+        return len(self._live)
+
+    def load(self, rows: Iterable[Tuple[ObjectId, datetime, Dict[str, Any]]]):
+        """rows: (scheduleId, session start, payload)."""
+        live = {sid: (start - self.lead, sid, payload) for sid, start, payload in rows}
+        with self._lock:
+            # entries the query didn't return (e.g. `add`ed while it ran) stay; the
+            # dispatcher's claim skips any that were cancelled meanwhile
+            for sid, entry in self._live.items():
+                live.setdefault(sid, entry)
+            heap = [(at, sid) for at, sid, _ in live.values()]
+            heapq.heapify(heap)
+            self._live, self._heap = live, heap
+
+    def add(self, sid: ObjectId, start: datetime, payload: Dict[str, Any]):
+        entry = (start - self.lead, sid, payload)
+        with self._lock:
+            self._live[sid] = entry
+            heapq.heappush(self._heap, (entry[0], sid))
+
+    def next_at(self) -> Optional[datetime]:
+        with self._lock:
+            self._drop_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: datetime) -> List[Reminder]:
+        out = []
+        with self._lock:
+            while True:
+                self._drop_stale()
+                if not self._heap or self._heap[0][0] > now:
+                    return out
+                _, sid = heapq.heappop(self._heap)
+                out.append(self._live.pop(sid))
+
+    def _drop_stale(self):
+        # caller holds the lock; skips entries already popped or re-added with a new time
+        while self._heap:
+            at, sid = self._heap[0]
+            live = self._live.get(sid)
+            if live is not None and live[0] == at:
+                return
+            heapq.heappop(self._heap)
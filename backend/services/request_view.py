@@ -0,0 +1,205 @@
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pymongo.collection import Collection
+from pymongo.errors import OperationFailure, PyMongoError
+
+
+class RequestView:
+    """
+    In-process copy of open/accepted requests, kept current from a change
+    stream on `requests`. Reads hand back a pre-rendered JSON body per status.
+
+    The same stream carries updates to the `requests` counter. A writer bumps
+    its `committed` count only after its write landed, so the write's own
+    events come first in the stream, and the view's version can move to each
+    count as it arrives. The view only answers while it is healthy (stream
+    alive, heartbeat fresh) and has caught up with the count the caller read;
+    otherwise it returns None and the caller falls back to a live query.
+    """
+
+    STATUSES = ("open", "accepted")
+
+    def __init__(
+        self,
+        requests: Collection,
+        counters: Collection,
+        state: Collection,
+        max_lag: float = 5.0,
+        check_interval: float = 300.0,
+    ):
+        self.requests = requests
+        self.counters = counters
+        self.state = state
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+
+        self._lock = threading.Lock()
+        self._docs: Dict[str, Dict[ObjectId, dict]] = {s: {} for s in self.STATUSES}
+        self._sorted: Dict[str, Optional[List[dict]]] = {s: None for s in self.STATUSES}
+        self._bodies: Dict[str, Optional[bytes]] = {s: None for s in self.STATUSES}
+        self.version = 0
+        self._heartbeat = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- lifecycle ---
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="request-view", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.max_lag)
+
+    @property
+    def healthy(self) -> bool:
+        return (
+            self._thread is not None
+            and self._thread.is_alive()
+            and time.monotonic() - self._heartbeat < self.max_lag
+        )
+
+    # --- reads ---
+    def _can_serve(self, status: str, min_version: int) -> bool:
+        return status in self.STATUSES and self.healthy and self.version >= min_version
+
+    def _newest_first(self, status: str) -> List[dict]:
+        # caller holds the lock; cached until the status list changes
+        if self._sorted[status] is None:
+            self._sorted[status] = sorted(
+                self._docs[status].values(),
+                key=lambda d: d.get("createdAt") or datetime.min,
+                reverse=True,
+            )
+        return self._sorted[status]
+
+    def body(self, status: str, min_version: int) -> Optional[bytes]:
+        """Rendered list for `status` (newest first), or None if the view can't vouch for it."""
+        if not self._can_serve(status, min_version):
+            return None
+        with self._lock:
+            if self._bodies[status] is None:
+                encoded = jsonable_encoder(self._newest_first(status), custom_encoder={ObjectId: str})
+                self._bodies[status] = JSONResponse(content=encoded).body
+            return self._bodies[status]
+
+    def newest(self, status: str, n: int, min_version: int) -> Optional[List[dict]]:
+        """The newest `n` docs for `status` (shared, don't mutate), or None like `body`."""
+        if not self._can_serve(status, min_version):
+            return None
+        with self._lock:
+            return self._newest_first(status)[:n]
+
+    # --- writes (watcher thread) ---
+    def load(self):
+        """Full snapshot from Mongo; replaces whatever is in memory."""
+        fresh: Dict[str, Dict[ObjectId, dict]] = {s: {} for s in self.STATUSES}
+        committed = self._committed()  # every write counted here is visible to the find below
+        for d in self.requests.find({"status": {"$in": list(self.STATUSES)}}, {"transitions": 0}):
+            fresh[d["status"]][d["_id"]] = d
+        with self._lock:
+            self._docs = fresh
+            self._sorted = {s: None for s in self.STATUSES}
+            self._bodies = {s: None for s in self.STATUSES}
+            self.version = max(self.version, committed)
+
+    def apply(self, change: Dict[str, Any]):
+        if change.get("ns", {}).get("coll") == self.counters.name:
+            self._advance(change)
+            return
+        rid = change["documentKey"]["_id"]
+        doc = change.get("fullDocument")
+        if doc:
+            doc.pop("transitions", None)
+        with self._lock:
+            current = next((d[rid] for d in self._docs.values() if rid in d), None)
+            if doc and current and doc.get("version", 0) < current.get("version", 0):
+                return  # an older lookup raced a newer one; keep what we have
+            for status, bucket in self._docs.items():
+                if bucket.pop(rid, None) is not None:
+                    self._sorted[status] = self._bodies[status] = None
+            if doc and doc.get("status") in self._docs:
+                self._docs[doc["status"]][rid] = doc
+                self._sorted[doc["status"]] = self._bodies[doc["status"]] = None
+
+    def _advance(self, change: Dict[str, Any]):
+        # updatedFields holds `committed` as of this update; fullDocument (a later lookup) may be ahead
+        if change.get("operationType") == "update":
+            committed = change.get("updateDescription", {}).get("updatedFields", {}).get("committed")
+        else:
+            committed = (change.get("fullDocument") or {}).get("committed")
+        if committed is not None:
+            self.version = max(self.version, committed)
+
+    def check(self) -> int:
+        """Compare ids/versions with Mongo; reload on any drift. Returns the number of mismatches."""
+        live = {
+            d["_id"]: (d["status"], d.get("version", 0))
+            for d in self.requests.find({"status": {"$in": list(self.STATUSES)}}, {"status": 1, "version": 1})
+        }
+        with self._lock:
+            mine = {
+                rid: (status, d.get("version", 0))
+                for status, bucket in self._docs.items()
+                for rid, d in bucket.items()
+            }
+        drift = len(set(live.items()) ^ set(mine.items()))
+        if drift:
+            self.load()
+        return drift
+
+    def _committed(self) -> int:
+        c = self.counters.find_one({"_id": "requests"})
+        return c.get("committed", 0) if c else 0
+
+    def _save_token(self, token):
+        self.state.update_one({"_id": "request_view"}, {"$set": {"resumeToken": token}}, upsert=True)
+
+    def _open_stream(self):
+        saved = self.state.find_one({"_id": "request_view"})
+        # requests plus the one counter doc, in one stream so their order is the commit order
+        pipeline = [{"$match": {"$or": [
+            {"ns.coll": self.requests.name},
+            {"ns.coll": self.counters.name, "documentKey._id": "requests"},
+        ]}}]
+        kwargs = dict(full_document="updateLookup", max_await_time_ms=1000)
+        database = self.requests.database
+        if saved and saved.get("resumeToken"):
+            try:
+                return database.watch(pipeline, resume_after=saved["resumeToken"], **kwargs)
+            except OperationFailure:
+                pass  # token fell off the oplog; start from now (the snapshot covers the gap)
+        return database.watch(pipeline, **kwargs)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                with self._open_stream() as stream:
+                    # stream is open before the snapshot, so nothing between the two is lost
+                    self.load()
+                    self._heartbeat = time.monotonic()
+                    last_check = time.monotonic()
+                    saved_token, saved_at = None, 0.0
+                    while not self._stop.is_set():
+                        change = stream.try_next()
+                        self._heartbeat = time.monotonic()
+                        if change:
+                            self.apply(change)
+                        token = stream.resume_token
+                        if token and token != saved_token and time.monotonic() - saved_at > self.max_lag:
+                            self._save_token(token)
+                            saved_token, saved_at = token, time.monotonic()
+                        if time.monotonic() - last_check > self.check_interval:
+                            self.check()
+                            last_check = time.monotonic()
+            except PyMongoError as e:
+                print("❌ Request view stream failed:", e)
+                self._stop.wait(self.max_lag)
@@ -0,0 +1,80 @@
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, Hashable, Iterable, List, Tuple
+
+Session = Tuple[datetime, datetime, Hashable]  # (start, end, schedule id)
+
+
+class SessionIndex:
+    """
+    Accepted sessions per user, sorted by start, plus a running max of their
+    ends. Sessions can still overlap (ones accepted before conflicts were
+    refused, or a long one spanning several short ones), so ends are not
+    sorted; the running max says when no earlier session can reach `start`
+    and the overlap walk stops there. O(log n + k) unless a long session
+    sits far back, in which case the walk covers everything after it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_user: Dict[Hashable, List[Session]] = {}
+        self._reach: Dict[Hashable, List[datetime]] = {}  # [i] = max end of sessions[:i + 1]
+
+    def load(self, rows: Iterable[Tuple[Hashable, Hashable, datetime, datetime]]):
+        """rows: (userId, scheduleId, start, end)."""
+        fresh: Dict[Hashable, List[Session]] = {}
+        for uid, sid, start, end in rows:
+            fresh.setdefault(uid, []).append((start, end, sid))
+        reach = {}
+        for uid, sessions in fresh.items():
+            sessions.sort(key=lambda s: s[0])
+            reach[uid] = self._running_max(sessions, [], 0)
+        with self._lock:
+            self._by_user, self._reach = fresh, reach
+
+    def add(self, uid: Hashable, sid: Hashable, start: datetime, end: datetime):
+        with self._lock:
+            sessions = self._by_user.setdefault(uid, [])
+            if any(s[2] == sid for s in self._at(sessions, start)):
+                return
+            i = bisect_right(sessions, start, key=lambda s: s[0])
+            sessions.insert(i, (start, end, sid))
+            self._reach[uid] = self._running_max(sessions, self._reach.get(uid, []), i)
+
+    @staticmethod
+    def _running_max(sessions: List[Session], reach: List[datetime], i: int) -> List[datetime]:
+        """Recompute reach from index i on (everything before it is unchanged)."""
+        reach = reach[:i]
+        for s in sessions[i:]:
+            reach.append(max(reach[-1], s[1]) if reach else s[1])
+        return reach
+
+    @staticmethod
+    def _at(sessions: List[Session], start: datetime) -> List[Session]:
+        i = bisect_left(sessions, start, key=lambda s: s[0])
+        out = []
+        while i < len(sessions) and sessions[i][0] == start:
+            out.append(sessions[i])
+            i += 1
+        return out
+
+    def conflicts(self, uid: Hashable, start: datetime, end: datetime) -> List[Session]:
+        """Accepted sessions of `uid` overlapping [start, end)."""
+        with self._lock:
+            sessions = self._by_user.get(uid)
+            if not sessions:
+                return []
+            reach = self._reach[uid]
+            # last session starting before `end`; walk left until nothing earlier reaches past `start`
+            i = bisect_left(sessions, end, key=lambda s: s[0]) - 1
+            hits = []
+            while i >= 0 and reach[i] > start:
+                if sessions[i][1] > start:
+                    hits.append(sessions[i])
+                i -= 1
+            hits.reverse()
+            return hits
+
+    def __len__(self):
+        return sum(len(v) for v in self._by_user.values())
@@ -0,0 +1,128 @@
+import re
+import threading
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from bson import ObjectId
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _features(course: str, topic: str, description: str) -> List[Tuple[str, float]]:
+    """Word unigrams + bigrams; course and topic words count more than description."""
+    feats: List[Tuple[str, float]] = []
+    for text, weight in ((course, 3.0), (topic, 2.0), (description, 1.0)):
+        words = _WORD.findall((text or "").lower())
+        feats.extend((w, weight) for w in words)
+        feats.extend((a + " " + b, weight) for a, b in zip(words, words[1:]))
+    return feats
+
+
+class SimilarityIndex:
+    """
+    Hashed TF-IDF vectors for open requests, one row per request in a dense
+    float32 matrix. "Top-k similar" is a single matrix-vector product.
+
+    Rows are stored idf-weighted and L2-normalised against an idf snapshot
+    taken at the last rebuild; document frequencies keep updating on every
+    add/remove and the snapshot is refreshed on the next rebuild.
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._matrix = np.zeros((0, dim), dtype=np.float32)
+        self._ids: List[ObjectId] = []
+        self._row: Dict[ObjectId, int] = {}
+        self._buckets: Dict[ObjectId, np.ndarray] = {}  # nonzero features per row, for df bookkeeping
+        self._df = np.zeros(dim, dtype=np.float64)
+        self._idf = np.ones(dim, dtype=np.float32)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _tf_vector(self, course: str, topic: str, description: str) -> np.ndarray:
+        v = np.zeros(self.dim, dtype=np.float32)
+        for tok, w in _features(course, topic, description):
+            h = zlib.crc32(tok.encode())
+            # signed hashing: collisions cancel out on average instead of piling up
+            v[h % self.dim] += w if (h >> 31) & 1 else -w
+        return v
+
+    def _weighted(self, tf: np.ndarray) -> np.ndarray:
+        v = tf * self._idf
+        n = np.linalg.norm(v)
+        return v / n if n else v
+
+    def _refresh_idf(self):
+        n = len(self._ids)
+        self._idf = (np.log((n + 1) / (self._df + 1)) + 1).astype(np.float32)
+
+    # --- bulk / incremental updates ---
+    def load(self, docs: Iterable[dict]):
+        """Rebuild from scratch (open requests); also refreshes the idf snapshot."""
+        ids, tfs = [], []
+        for d in docs:
+            ids.append(d["_id"])
+            tfs.append(self._tf_vector(d.get("course"), d.get("topic"), d.get("description")))
+        tf = np.vstack(tfs) if tfs else np.zeros((0, self.dim), dtype=np.float32)
+        df = (tf != 0).sum(axis=0).astype(np.float64)
+        with self._lock:
+            self._ids = ids
+            self._row = {rid: i for i, rid in enumerate(ids)}
+            self._buckets = {rid: np.flatnonzero(row) for rid, row in zip(ids, tf)}
+            self._df = df
+            self._refresh_idf()
+            weighted = tf * self._idf
+            norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+            norms[norms == 0] = 1
+            self._matrix = np.ascontiguousarray(weighted / norms, dtype=np.float32)
+
+    def add(self, doc: dict):
+        tf = self._tf_vector(doc.get("course"), doc.get("topic"), doc.get("description"))
+        with self._lock:
+            if doc["_id"] in self._row:
+                return
+            buckets = np.flatnonzero(tf)
+            self._df[buckets] += 1
+            self._buckets[doc["_id"]] = buckets
+            self._row[doc["_id"]] = len(self._ids)
+            self._ids.append(doc["_id"])
+            if len(self._ids) > self._matrix.shape[0]:
+                # grow geometrically so appends stay amortised O(dim)
+                grown = np.zeros((max(16, 2 * self._matrix.shape[0]), self.dim), dtype=np.float32)
+                grown[: self._matrix.shape[0]] = self._matrix
+                self._matrix = grown
+            self._matrix[len(self._ids) - 1] = self._weighted(tf)
+
+    def remove(self, rid: ObjectId):
+        with self._lock:
+            i = self._row.pop(rid, None)
+            if i is None:
+                return
+            self._df[self._buckets.pop(rid)] -= 1
+            last = len(self._ids) - 1
+            if i != last:
+                # move the last row into the hole
+                moved = self._ids[last]
+                self._ids[i] = moved
+                self._row[moved] = i
+                self._matrix[i] = self._matrix[last]
+            self._ids.pop()
+            self._matrix[last] = 0
+
+    # --- reads ---
+    def similar(self, course: str, topic: str, description: str = "", k: int = 5,
+                exclude: Optional[ObjectId] = None, min_score: float = 0.1) -> List[Tuple[ObjectId, float]]:
+        q = self._tf_vector(course, topic, description)
+        with self._lock:
+            n = len(self._ids)
+            if not n or not q.any():
+                return []
+            scores = self._matrix[:n] @ self._weighted(q)
+            take = min(k + 1, n)  # +1 leaves room for `exclude`
+            top = np.argpartition(-scores, take - 1)[:take]
+            top = top[np.argsort(-scores[top])]
+            hits = [(self._ids[i], float(scores[i])) for i in top]
+        return [(rid, round(s, 4)) for rid, s in hits if rid != exclude and s >= min_score][:k]
@@ -0,0 +1,36 @@
+import asyncio
+from typing import Any, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Coalesce identical concurrent calls: the first caller for a key runs `fn`
+    in a worker thread, everyone arriving while it is in flight awaits the
+    same result. Nothing is cached once the call finishes.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(asyncio.to_thread(fn))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.followers += 1
+        # shield: one caller disconnecting must not cancel the query for the rest
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.leaders + self.followers
+        return {
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "inflight": len(self._inflight),
+            "coalescingRatio": round(self.followers / total, 4) if total else 0.0,
+        }
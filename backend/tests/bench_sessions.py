@@ -0,0 +1,53 @@
+"""
+SessionIndex with users holding thousands of accepted sessions.
+
+    python -m backend.tests.bench_sessions [users] [sessions_per_user]
+
+Loads the index, times conflict queries, and checks every answer of a sample
+against a brute-force scan. Some sessions overlap on purpose (long ones
+spanning short ones), since the index must not rely on sorted end times.
+"""
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from backend.services.sessions import SessionIndex
+
+
+def main(users: int = 200, per_user: int = 5000, queries: int = 100_000):
+    rng = random.Random(2)
+    base = datetime(2025, 1, 1)
+    rows = []
+    for u in range(users):
+        t = base
+        for k in range(per_user):
+            t += timedelta(minutes=rng.randint(60, 600))
+            length = rng.choice([30, 45, 60]) if rng.random() > 0.02 else 12 * 60
+            rows.append((u, (u, k), t, t + timedelta(minutes=length)))
+
+    ix = SessionIndex()
+    started = time.perf_counter()
+    ix.load(rows)
+    print(f"load {len(rows):,} sessions: {time.perf_counter() - started:.2f}s")
+
+    span = per_user * 330
+    qs = [(rng.randrange(users), base + timedelta(minutes=rng.randint(0, span))) for _ in range(queries)]
+    started, hits = time.perf_counter(), 0
+    for u, s in qs:
+        hits += bool(ix.conflicts(u, s, s + timedelta(hours=1)))
+    per_query = (time.perf_counter() - started) / len(qs) * 1e6
+    print(f"conflicts(): {per_query:.1f}us per query, {hits / len(qs):.0%} with a hit")
+
+    by_user = {}
+    for u, sid, s, e in rows:
+        by_user.setdefault(u, []).append((s, e, sid))
+    for u, s in qs[:1000]:
+        e = s + timedelta(hours=1)
+        expected = sorted(x[2] for x in by_user[u] if x[0] < e and x[1] > s)
+        assert sorted(x[2] for x in ix.conflicts(u, s, e)) == expected, (u, s)
+    print("sample matches brute force")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,56 @@
+"""
+SimilarityIndex at 100k open requests.
+
+    python -m backend.tests.bench_similarity [open_requests]
+
+Times a full load, top-k queries and incremental remove/add, and checks that
+a request's own text ranks it first.
+"""
+import random
+import sys
+import time
+
+from bson import ObjectId
+
+from backend.services.similarity import SimilarityIndex
+
+WORDS = (
+    "graph tree dp recursion proof induction matrix vector integral derivative limit "
+    "series essay thesis lab circuit pointer heap sort hash"
+).split()
+
+
+def main(n: int = 100_000, queries: int = 100):
+    rng = random.Random(1)
+    docs = [{
+        "_id": ObjectId(),
+        "course": f"COMP {rng.randint(100, 499)}",
+        "topic": " ".join(rng.sample(WORDS, 2)),
+        "description": " ".join(rng.choices(WORDS, k=15)),
+    } for _ in range(n)]
+
+    ix = SimilarityIndex()
+    started = time.perf_counter()
+    ix.load(docs)
+    print(f"load {n:,} open requests: {time.perf_counter() - started:.2f}s")
+
+    started = time.perf_counter()
+    for _ in range(queries):
+        ix.similar("COMP 182", "graph tree", "dp proof", k=5)
+    print(f"similar(k=5): {(time.perf_counter() - started) / queries * 1e3:.1f}ms per query")
+
+    churn = docs[:1000]
+    started = time.perf_counter()
+    for d in churn:
+        ix.remove(d["_id"])
+    for d in churn:
+        ix.add(d)
+    print(f"remove + add: {(time.perf_counter() - started) / (2 * len(churn)) * 1e6:.0f}us each")
+
+    d = docs[5]
+    assert ix.similar(d["course"], d["topic"], d["description"], k=1)[0][0] == d["_id"]
+    print("a request's own text ranks it first")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
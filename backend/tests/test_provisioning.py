@@ -0,0 +1,94 @@
+"""
+Parallel first logins must all resolve to one live user doc (the legacy one
+when an account with the same email already exists).
+
+Runs against mongomock: pip install pytest mongomock
+"""
+import os
+import threading
+import time
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost/provisioning_test")
+os.environ.setdefault("AUTH0_DOMAIN", "example.auth0.com")
+os.environ.setdefault("AUTH0_AUDIENCE", "test")
+
+import pymongo  # noqa: E402
+
+pymongo.MongoClient = mongomock.MongoClient
+# mongomock has no RawBSONDocument codec; the raw read paths aren't exercised here
+_with_options = mongomock.collection.Collection.with_options
+mongomock.collection.Collection.with_options = (
+    lambda self, codec_options=None, **kw: self if codec_options is not None else _with_options(self, **kw)
+)
+from backend import main  # noqa: E402
+
+LOGINS = 8
+
+
+@pytest.fixture(autouse=True)
+def clean_users():
+    main.db.users.drop()
+    main._ensure_indexes()
+    yield
+    main.db.users.drop()
+
+
+def _login_in_parallel(token: dict) -> list:
+    barrier = threading.Barrier(LOGINS)
+    results, errors = [], []
+
+    def login():
+        barrier.wait()
+        try:
+            results.append(main._provision_user(token))
+        except Exception as e:  # surfaced below with the thread's result
+            errors.append(e)
+
+    threads = [threading.Thread(target=login) for _ in range(LOGINS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors, errors
+    return results
+
+
+@pytest.mark.parametrize("round_", range(20))
+def test_parallel_first_login_creates_one_user(round_):
+    token = {"sub": f"auth0|new{round_}", "email": f"new{round_}@x.edu", "name": "New"}
+    results = _login_in_parallel(token)
+
+    docs = list(main.db.users.find({"auth0Sub": token["sub"]}))
+    assert len(docs) == 1
+    assert {r["_id"] for r in results} == {docs[0]["_id"]}
+    assert "linkPending" not in docs[0]
+
+
+@pytest.fixture
+def slow_link(monkeypatch):
+    # widen the window between creating the placeholder and swapping it for the legacy doc
+    link = main._link_legacy_account
+
+    def slowed(fresh, email):
+        time.sleep(0.01)
+        return link(fresh, email)
+
+    monkeypatch.setattr(main, "_link_legacy_account", slowed)
+
+
+@pytest.mark.parametrize("round_", range(20))
+def test_parallel_first_login_links_legacy_account(round_, slow_link):
+    legacy_id = main.db.users.insert_one(
+        {"email": f"old{round_}@x.edu", "name": "Old", "points": 140}
+    ).inserted_id
+    token = {"sub": f"auth0|old{round_}", "email": f"old{round_}@x.edu", "name": "Old"}
+    results = _login_in_parallel(token)
+
+    # every caller got the legacy doc, never a placeholder that was deleted meanwhile
+    assert {r["_id"] for r in results} == {legacy_id}
+    assert main.db.users.count_documents({"email": token["email"]}) == 1
+    assert main.db.users.find_one({"_id": legacy_id})["auth0Sub"] == token["sub"]
@@ -12,6 +12,7 @@ import Profile from "./Components/Profile/Profile";
 
 import {
   fetchMe,
+  fetchBootstrap,
   createRequest,
   acceptRequest,
   completeRequest,
@@ -43,28 +44,13 @@ export default function App() {
     console.log("Auth0 state:", { isLoading, isAuthenticated, user, error });
   }, [isLoading, isAuthenticated, user, error]);
 
-  async function fetchByStatus(status, mine = false) {
-    const token = await getAccessTokenSilently({
-      audience: import.meta.env.VITE_AUTH0_AUDIENCE,
-    });
-    const url = `${API}/requests?status=${status}${mine ? "&mine=1" : ""}`;
-    const res = await fetch(url, {
-      headers: { Authorization: `Bearer ${token}` },
-    });
-    return res.json();
-  }
-
   async function refetchAll() {
-    const [meData, openL, accL, compL] = await Promise.all([
-      fetchMe(getAccessTokenSilently),
-  fetchByStatus("open"),
-  fetchByStatus("accepted"),
-  fetchByStatus("completed"),  // only mine (as student or tutor)
-    ]);
-    setMe(meData);
-    setOpen(openL);
-    setAccepted(accL);
-    setCompleted(compL);
+    // one round trip: me + open/accepted/completed
+    const data = await fetchBootstrap(getAccessTokenSilently);
+    setMe(data.me);
+    setOpen(data.open);
+    setAccepted(data.accepted);
+    setCompleted(data.completed);
   }
 
   useEffect(() => {
@@ -90,6 +76,7 @@ export default function App() {
                 "request:created",
                 "request:accepted",
                 "request:completed",
+                "request:expired",
                 "user:points_changed",
                 "schedule:proposed",     // add
     "schedule:accepted",     // add
@@ -38,6 +38,11 @@ export async function fetchMe(getAccessTokenSilently) {
   return handle(await fetch(`${API}/me`, opts));
 }
 
+export async function fetchBootstrap(getAccessTokenSilently) {
+  const opts = await withToken(getAccessTokenSilently);
+  return handle(await fetch(`${API}/bootstrap`, opts));
+}
+
 export async function fetchOpenRequests(getAccessTokenSilently) {
   const opts = await withToken(getAccessTokenSilently);
   return handle(await fetch(`${API}/requests?status=open`, opts));